@@ -9,7 +9,13 @@ from .flyweight import *
 from .dictionary import *
 from .human import *
 from .req import *
-from .plots import *
+
+# The plots need the plotting extras (plotly, bokeh), the rest of the
+# package does not.
+try:
+    from .plots import *
+except ImportError:
+    pass
 
 
 __version__=0.1
\ No newline at end of file
@@ -13,9 +13,10 @@ should be abstracted with plus and minus signs for simple manipulation.
 By separating the nutrients and the ingredients, it is possible for future
 extension with more databases. 
 """
-import pandas as pd
+import itertools
+import sys
 
-from collections import defaultdict, OrderedDict
+import numpy as np
  
 
 # format string used for representation of things
@@ -24,6 +25,73 @@ entry_format_str = "{abbr:<10s} {value:<10.2f} {unit:<10s} {name:<15s}\n"
 recipe_title_format_str = "{index:<5} {value:<10} {unit:<5s} {db:10s} {name: <20s}\n"
 recipe_entry_format_str = "{index:<5} {value:<10.1f} {unit:<5s} {db:10s} {name: <20s}\n"
 
+# The nutrient title never changes, so it is formatted once.
+title_str = title_format_str.format(abbr='ABBR',
+									name='NAME',
+									value='VALUE',
+									unit='UNIT')
+
+# Types accepted as scalars by the algebraic operations.
+scalar_types = (int, float)
+
+# Types accepted as keys by indexing and deletion.
+key_types = (str, list)
+
+# Below this number of nutrients, numpy call overhead outweighs the gain of
+# operating on the values as a single array (see Nutrients._use_arrays).
+vectorize_min_size = 8
+
+# From this number of children on, basket nutrients are summed with
+# Nutrients.sum_many rather than by repeated addition.
+sum_many_min_size = 4
+
+# Versions given to baskets on every change of their children, see
+# BasketComponent.update_attr. Drawn from one counter so that a version is
+# never reused, even by another basket.
+_basket_versions = itertools.count()
+
+# Single-source sets shared by all nutrients of the same source, see
+# _single_source.
+_source_sets = dict()
+
+def _single_source(source):
+	"Frozen set holding only source, interned per source name."
+
+	try:
+		return _source_sets[source]
+	except KeyError:
+		return _source_sets.setdefault(source, frozenset((source, )))
+
+def _intern(string):
+	"""Interned copy of string, other types are returned unchanged.
+
+	Names, units and abbrs come from a small vocabulary, interning them
+	makes the abbr dict lookups and the compatibility tests of nutrients
+	identity comparisons.
+
+	"""
+
+	if type(string) == str:
+		return sys.intern(string)
+
+	return string
+
+def _aligned(meta, values, abbrs):
+	"""Whether values, of the nutrients in meta, are in the order of abbrs.
+
+	True when meta holds exactly abbrs in the same order, e.g. for the
+	scalings of one item or items of one collection, so no values need to
+	be gathered. Both are walked only when the lengths agree.
+
+	"""
+
+	return len(values) == len(abbrs) and list(meta) == abbrs
+
+def _nutrient_row(nut):
+	"Helper function for a nutrient row, same layout as entry_format_str."
+
+	return f"{nut.abbr:<10s} {nut.value:<10.2f} {nut.unit:<10s} {nut.name:<15s}\n"
+
 class Nutrient(object):
 	"""A basic concrete class for handling nutrient-level operations.
 
@@ -38,6 +106,10 @@ class Nutrient(object):
 	  support required.
 	"""
 
+	# Nutrient objects are created for every nutrient of every operation
+	# result, slots keep them small and make attribute access cheaper.
+	__slots__ = ('name', 'value', 'unit', 'abbr', 'name_source', 'source')
+
 	def __init__(self, name, value, unit, abbr, source='Unknown', name_source='Unknown'):
 		"""Initiation of Nutrient object.
 
@@ -66,16 +138,17 @@ class Nutrient(object):
 
 		"""
 
-		self.name = name
+		self.name = _intern(name)
 		self.value = value
-		self.unit = unit
-		self.abbr = abbr
-		self.name_source=name_source
-		self.source = set()
+		self.unit = _intern(unit)
+		self.abbr = _intern(abbr)
+		self.name_source = _intern(name_source)
 		if type(source) == str:
-			self.source.add(source)
-		elif type(source) == set:
-			self.source.update(source)
+			self.source = _single_source(source)
+		elif isinstance(source, (set, frozenset)):
+			self.source = frozenset(source)
+		else:
+			self.source = frozenset()
 
 
 	def __add__(self, other):
@@ -97,17 +170,48 @@ class Nutrient(object):
 		"""
 
 
-		assert self.__type_test(other), "Type mismatch between two nutrient objects."
+		# Raises on a mismatch, also under python -O.
+		self.__type_test(other)
+
+		return self._fast_add(other)
+
+	def _fast_add(self, other):
+		"""Addition with a Nutrient already tested to be compatible.
+
+		__init__ is skipped, and the source set of self is shared with the
+		result when other brings no new source.
+
+		"""
+
+		new = self._with_value(self.value + other.value)
+		new.source = self._merged_source(other)
+
+		return new
 
-		source = self.source.copy()
-		source.update(other.source)
+	def _with_value(self, value):
+		"""Copy of self holding another value, __init__ is skipped.
+
+		name, unit, abbr and the (frozen) source set are shared with self.
+
+		"""
 
-		return Nutrient(name=self.name,
-						value=self.value + other.value,
-						unit=self.unit,
-						abbr=self.abbr,
-						source=source,
-						name_source=self.name_source)
+		new = Nutrient.__new__(Nutrient)
+		new.name = self.name
+		new.value = value
+		new.unit = self.unit
+		new.abbr = self.abbr
+		new.name_source = self.name_source
+		new.source = self.source
+
+		return new
+
+	def _merged_source(self, other):
+		"""Union of both sources, self.source itself when other adds none."""
+
+		if other.source is self.source or other.source <= self.source:
+			return self.source
+
+		return self.source | other.source
 
 	def __sub__(self, other):
 		"""Subtraction of another Nutrient object.
@@ -131,20 +235,16 @@ class Nutrient(object):
 		
 		"""
 
-		assert self.__type_test(other), "Type mismatch between two nutrient objects."
-
-		assert (self.value >= other.value), "First nutrient value smaller than the second."
+		# Raises on a mismatch, also under python -O.
+		self.__type_test(other)
 
-		source = self.source.copy()
-		source.update(other.source)
+		if self.value < other.value:
+			raise ValueError("First nutrient value smaller than the second.")
 
+		new = self._with_value(self.value - other.value)
+		new.source = self._merged_source(other)
 
-		return Nutrient(name=self.name,
-						value=self.value - other.value,
-						unit=self.unit,
-						abbr=self.abbr,
-						source=source,
-						name_source=self.name_source)
+		return new
 
 	def __mul__(self, scalar):
 		"""Multiplication with a scalar.
@@ -166,17 +266,12 @@ class Nutrient(object):
 
 		"""
 
-		if type(scalar) not in [int, float]:
+		if not isinstance(scalar, scalar_types):
 			raise ValueError("Must be multiplied with a scalar.")
 
 		assert (scalar >= 0), "Scalar must be equal or larger than zero!"
 
-		return Nutrient(name=self.name,
-						value=self.value * scalar,
-						unit=self.unit,
-						abbr=self.abbr,
-						source=self.source,
-						name_source=self.name_source)
+		return self._with_value(self.value * scalar)
 
 	def __rmul__(self, scalar):
 		"""Reverse multiplication. 
@@ -230,15 +325,10 @@ class Nutrient(object):
 
 		"""
 
-		if type(other) in [int, float]:
+		if isinstance(other, scalar_types):
 			assert (other > 0), "Scalar must be larger than zero!"
 
-			return Nutrient(name=self.name,
-							value=self.value / other,
-							unit=self.unit,
-							abbr=self.abbr,
-							source=self.source,
-							name_source=self.name_source)
+			return self._with_value(self.value / other)
 
 		elif self.__type_test(other):
 
@@ -279,7 +369,7 @@ class Nutrient(object):
 			self.value divided by the scalar or other.value.
 		"""
 
-		if type(other) in [int, float]:
+		if isinstance(other, scalar_types):
 			assert (other > 0), "Scalar must be larger than zero!"
 
 			return Nutrient(name=self.name,
@@ -321,7 +411,7 @@ class Nutrient(object):
 			self.value modularized by the scalar or other.value.
 		"""
 
-		if type(other) in [int, float]:
+		if isinstance(other, scalar_types):
 			assert (other > 0), "Scalar must be larger than zero!"
 
 			return Nutrient(name=self.name,
@@ -469,15 +559,7 @@ class Nutrient(object):
 	def __repr__(self):
 		"""The representation of objects of Nutrient class."""
 
-		title_str = title_format_str.format(abbr='ABBR',
-										    name='NAME',
-										    value='VALUE',
-										    unit='UNIT')
-		entry_str = entry_format_str.format(abbr=self.abbr,
-										    name=self.name,
-										    value=self.value,
-										    unit=self.unit)
-		return title_str + entry_str
+		return title_str + _nutrient_row(self)
 
 	def __type_test(self, other):
 		"""Internal method to testing compatibility.
@@ -499,7 +581,7 @@ class Nutrient(object):
 
 		"""
 
-		if type(other) != Nutrient:
+		if not isinstance(other, Nutrient):
 			raise TypeError("Second argument must be a Nutrient object.")
 			return False
 
@@ -565,6 +647,18 @@ class Nutrients(object):
 
 	"""
 
+	# Cached float array of the nutrient values and position of each abbr in
+	# it, see self._values_array and self._abbr_index.
+	_values = None
+	_index = None
+
+	# Results of array operations hold their values in _values only, and
+	# _template maps each abbr to a Nutrient object with the right name,
+	# unit, abbr and source (its value is not used). The Nutrient objects of
+	# such a result are built the first time self.nutrients is read.
+	_nutrients = None
+	_template = None
+
 	def __init__(self, input_nutrients=list()):
 		"""Initiation of Nutrient object
 
@@ -573,7 +667,7 @@ class Nutrients(object):
 		__add_nutrients method, which conducts the type and format check.
 
 		While input_nutrients are entered as list, they are transformed into
-		OrderedDict afer initiation. 
+		a dict afer initiation. 
 
 		Parameters
 		----------
@@ -583,10 +677,43 @@ class Nutrients(object):
 
 		"""
 
-		self.nutrients = OrderedDict()
+		self.nutrients = dict()
 		self.add_nutrients(input_nutrients)
 
-		
+	@property
+	def nutrients(self):
+		"""dict of abbr and Nutrient object, in insertion order."""
+
+		if self._nutrients is None and self._template is not None:
+
+			self._nutrients = {abbr: nut._with_value(value)
+							   for (abbr, nut), value in zip(self._template.items(),
+															 self._values.tolist())}
+			self._template = None
+
+		return self._nutrients
+
+	@nutrients.setter
+	def nutrients(self, nutrients):
+
+		self._nutrients = nutrients
+		self._template = None
+		self._values = None
+		self._index = None
+
+	def _meta(self):
+		"""dict of abbr and Nutrient object with valid name, unit and source.
+
+		Same as self.nutrients, except for results of array operations whose
+		Nutrient objects are not built yet: their template is returned, and
+		the values must be read from self._values_array instead.
+
+		"""
+
+		if self._nutrients is None:
+			return self._template
+
+		return self._nutrients
 
 	def add_nutrients(self, nutrients):
 		"""Insert nutrients into the Nutrients object.
@@ -597,25 +724,42 @@ class Nutrients(object):
 			Nutrient object or a list of Nutrient objects to be added.
 		
 		"""
-		if type(nutrients) not in [Nutrient, list]:
+		if not isinstance(nutrients, (Nutrient, list)):
 
 			raise TypeError("Input type must be Nutrient or list.")
 
-		if type(nutrients) == Nutrient:
+		if isinstance(nutrients, Nutrient):
 
 			nutrients = [nutrients, ]
 
+		# Build the Nutrient objects, if needed, before the values are reset.
+		current = self.nutrients
+
+		self._values = None
+		self._index = None
+
+		# Usually all abbrs are new and distinct, e.g. when a database item
+		# is loaded: insert them with a single dict update.
+		new_nutrients = {nutrient.abbr: nutrient for nutrient in nutrients}
+
+		if len(new_nutrients) == len(nutrients) \
+		   and current.keys().isdisjoint(new_nutrients):
+
+			current.update(new_nutrients)
+
+			return
+
 		for nutrient in nutrients:
 
-			if nutrient.abbr in self.nutrients:
+			if nutrient.abbr in current:
 				# Cumulate nutrient values if there is existing Nutrient object
 				# of the same type.
-				assert self.nutrients[nutrient.abbr]._Nutrient__type_test(nutrient), "Nutrient not compatible with existing nutrient"
-				self.nutrients[nutrient.abbr] = self.nutrients[nutrient.abbr] + nutrient
+				current[nutrient.abbr]._Nutrient__type_test(nutrient)
+				current[nutrient.abbr] = current[nutrient.abbr]._fast_add(nutrient)
 			else:
 				# Add Nutrient to collection if no existing Nutrient object
 				# of the same type. 
-				self.nutrients[nutrient.abbr] = nutrient
+				current[nutrient.abbr] = nutrient
 
 
 	def __nutrient_check(nutrient):
@@ -665,43 +809,52 @@ class Nutrients(object):
 		"""
 
 		# check other type
-		if type(other) != Nutrients:
+		if not isinstance(other, Nutrients):
 			if other == 0:
 				return self
 			else:
 				raise TypeError("Second argument not Nutrients object")
 
 		# Initiate a new dictionary for addition.
-		newNutrients_dict = OrderedDict()
+		newNutrients_dict = dict()
 
-		# Obtain the keys from both Nutrients objects. 
-		self_keys = self.nutrients.keys()
-		other_keys = other.nutrients.keys()
+		# Keys are walked in insertion order and looked up in the other
+		# dict, no set of keys is built.
+		self_keys = self._meta()
+		other_keys = other._meta()
 
 		# Perform addition.
 		if method == "union":
 
-			for abbr in self_keys | other_keys:
+			self_keys = self.nutrients
+			other_keys = other.nutrients
 
-				if abbr in self_keys & other_keys:
+			# Copy self in one go, overwrite the common abbrs in place, then
+			# append what only other has; no branching per abbr.
+			newNutrients_dict.update(self_keys)
 
-					newNutrients_dict[abbr] = self.nutrients[abbr] + other.nutrients[abbr]
+			for abbr in [abbr for abbr in self_keys if abbr in other_keys]:
 
-				elif abbr in self_keys and abbr not in other_keys:
+				newNutrients_dict[abbr] = self.nutrients[abbr] + other.nutrients[abbr]
 
-					newNutrients_dict[abbr] = self.nutrients[abbr]
+			newNutrients_dict.update((abbr, nut) for abbr, nut in other_keys.items()
+									 if abbr not in self_keys)
 
-				elif abbr not in self_keys and abbr in other_keys:
+		elif method == "intersect":
 
-					newNutrients_dict[abbr] = other.nutrients[abbr]
+			abbrs = [abbr for abbr in self_keys if abbr in other_keys]
 
-		elif method == "intersect":
+			if self._use_arrays(other, abbrs):
 
-			for abbr in self_keys & other_keys:
+				values, other_values = self._aligned_values(other, abbrs)
+
+				return self._merged(other, abbrs, np.add(values, other_values))
+
+			for abbr in abbrs:
 
 				newNutrients_dict[abbr] = self.nutrients[abbr] + other.nutrients[abbr]
 
-		return Nutrients(input_nutrients=list(newNutrients_dict.values()))
+		return Nutrients._from_dict(newNutrients_dict)
 
 	def __add__(self, other):
 		"""Wrapper function of self.add for operation overloading on "+". """
@@ -709,7 +862,14 @@ class Nutrients(object):
 		return self.add(other, method="intersect")
 
 	def __radd__(self, other):
-		"""Wrapper function of self.add for operation overloading on "+". """
+		"""Wrapper function of self.add for operation overloading on "+".
+
+		The 0 that sum() starts from is answered right away with self.
+
+		"""
+
+		if other == 0:
+			return self
 
 		return self.add(other, method="intersect")
 
@@ -736,36 +896,54 @@ class Nutrients(object):
 
 		"""
 		# check other type
-		if type(other) != Nutrients:
+		if not isinstance(other, Nutrients):
 			raise TypeError("Second argument not Nutrients object")
 
-		newNutrients_dict = OrderedDict()
+		newNutrients_dict = dict()
 
-		self_keys = self.nutrients.keys()
-		other_keys = other.nutrients.keys()
+		self_keys = self._meta()
+		other_keys = other._meta()
 
 		if method == "union":
 
-			for abbr in self_keys | other_keys:
+			self_keys = self.nutrients
+			other_keys = other.nutrients
+
+			# Same three passes as in add.
+			newNutrients_dict.update(self_keys)
 
-				if abbr in self_keys & other_keys:
+			for abbr in [abbr for abbr in self_keys if abbr in other_keys]:
 
-					newNutrients_dict[abbr] = self.nutrients[abbr] - other.nutrients[abbr]
+				newNutrients_dict[abbr] = self.nutrients[abbr] - other.nutrients[abbr]
 
-				elif abbr in self_keys and abbr not in other_keys:
+			newNutrients_dict.update((abbr, float('-inf')) for abbr in other_keys
+									 if abbr not in self_keys)
 
-					newNutrients_dict[abbr] = self.nutrients[abbr]
+		if method == "intersect":
 
-				elif abbr not in self_keys and abbr in other_keys:
+			abbrs = [abbr for abbr in self_keys if abbr in other_keys]
 
-					newNutrients_dict[abbr] = float('-inf')
+			if self._use_arrays(other, abbrs):
 
-		if method == "intersect":
+				values, other_values = self._aligned_values(other, abbrs)
 
-			for abbr in self_keys & other_keys:
+				# Units and names are tested by _merged first, then the
+				# values, as in Nutrient.__sub__.
+				difference = self._merged(other, abbrs, np.subtract(values, other_values))
+
+				if not (values >= other_values).all():
+					raise ValueError("First nutrient value smaller than the second.")
+
+				return difference
+
+			for abbr in abbrs:
 
 				newNutrients_dict[abbr] = self.nutrients[abbr] - other.nutrients[abbr]
 
+			return Nutrients._from_dict(newNutrients_dict)
+
+		# The union may hold float('-inf') for abbrs missing in self, the
+		# checks of add_nutrients are kept for it.
 		return Nutrients(input_nutrients=list(newNutrients_dict.values()))
 
 	def __sub__(self, other):
@@ -794,18 +972,26 @@ class Nutrients(object):
 
 		"""
 
-		if type(scalar) not in [int, float]:
+		if not isinstance(scalar, scalar_types):
 			raise ValueError("Must be multiplied with a scalar.")
 
 		assert (scalar >= 0), "Scalar must be equal or larger than zero!"
 
-		newNutrients_dict = OrderedDict()
+		if self._use_arrays(self, self._meta()):
 
-		for abbr in self.nutrients.keys():
+			values = self._values_array()
 
-			newNutrients_dict[abbr] = self.nutrients[abbr] * scalar
+			return self._with_values(np.multiply(values, scalar,
+												 out=np.empty_like(values)))
 
-		return Nutrients(input_nutrients=list(newNutrients_dict.values()))
+		newNutrients_dict = dict()
+
+		# The scalar is checked once above, not again per nutrient.
+		for abbr, nut in self.nutrients.items():
+
+			newNutrients_dict[abbr] = nut._with_value(nut.value * scalar)
+
+		return Nutrients._from_dict(newNutrients_dict)
 
 	def __rmul__(self, scalar):
 		"""Wrapper function of self.__mul__ for operation overloading on "*"."""
@@ -832,62 +1018,361 @@ class Nutrients(object):
 
 		"""
 
-		if type(other) not in [int, float, Nutrients]:
+		if not (isinstance(other, scalar_types) or isinstance(other, Nutrients)):
 			raise ValueError("Must be multiplied with a scalar or a Nutrients object.")
 
-		newNutrients_dict = OrderedDict()
+		newNutrients_dict = dict()
 
-		if type(other) in [int, float]:
+		if isinstance(other, scalar_types):
 
 			assert (other > 0), "Scalar must be larger than zero!"
 
-			for abbr in self.nutrients.keys():
+			if self._use_arrays(self, self._meta()):
+
+				values = self._values_array()
+
+				return self._with_values(np.divide(values, other,
+												   out=np.empty_like(values)))
+
+			for abbr, nut in self.nutrients.items():
 
-				newNutrients_dict[abbr] = self.nutrients[abbr] / other
+				newNutrients_dict[abbr] = nut._with_value(nut.value / other)
 
 		else:
 
 			if method == 'intersect':
-				for abbr in self.keys() & other.keys():
+				for abbr in [abbr for abbr in self.nutrients if abbr in other.nutrients]:
 					newNutrients_dict[abbr] = self.nutrients[abbr] / other.nutrients[abbr]
 			elif method == 'union':
 				raise ValueError("union can't be performed.")
 
-		return Nutrients(input_nutrients=list(newNutrients_dict.values()))
+		return Nutrients._from_dict(newNutrients_dict)
+
+	def align_to(self, abbrs):
+		"""Values of the given abbrs as a float array.
+
+		Parameters
+		----------
+		abbrs : list or tuple
+			The abbrs of the nutrients, in the order wanted in the array.
+
+		Returns
+		-------
+		numpy.ndarray
+			Values of the nutrients, NaN for abbrs missing in self.
+
+		"""
+
+		values = self._values_array()
+		index = self._abbr_index()
+
+		return np.fromiter((values[index[abbr]] if abbr in index else np.nan
+							for abbr in abbrs),
+						   dtype=np.float64,
+						   count=len(abbrs))
+
+	@staticmethod
+	def from_values(nutrients, values):
+		"""Nutrients object of the given nutrients with separate values.
+
+		No Nutrient object is built until the nutrients are read, so
+		loaders can pass the same template nutrients for every item.
+
+		Parameters
+		----------
+		nutrients : list
+			Nutrient objects giving name, unit, abbr and source, their own
+			values are not used.
+		values : numpy.ndarray
+			Float values of the nutrients, in the same order.
+
+		Returns
+		-------
+		Nutrients
+			Same result as Nutrients with the nutrients at the given values.
+
+		"""
+
+		template = {nut.abbr: nut for nut in nutrients}
+
+		if len(template) < len(nutrients):
+			# Repeated abbrs are cumulated by add_nutrients.
+			return Nutrients([nut._with_value(value)
+							  for nut, value in zip(nutrients, values.tolist())])
+
+		return Nutrients._from_array(template, values)
+
+	@staticmethod
+	def sum_many(nutrients_list):
+		"""Intersect addition of many Nutrients objects at once.
+
+		Same result as sum(nutrients_list), but the values of all objects
+		are aligned on the common abbrs and reduced with a single np.sum,
+		instead of building an intermediate Nutrients object per addition.
+
+		Parameters
+		----------
+		nutrients_list : list
+			A list of Nutrients objects to be added.
+
+		Returns
+		-------
+		Nutrients
+			Nutrients object with summation results, 0 for an empty list.
+
+		"""
+
+		if len(nutrients_list) == 0:
+			return 0
+
+		metas = [nutrients._meta() for nutrients in nutrients_list]
+		common = set(metas[0]).intersection(*metas[1:])
+		abbrs = [abbr for abbr in metas[0] if abbr in common]
+
+		# One working array accumulates the aligned values of each object in
+		# place, in the same order as repeated addition.
+		values = np.zeros(len(abbrs), dtype=np.float64)
+
+		for nutrients, meta in zip(nutrients_list, metas):
+
+			row = nutrients._values_array()
+
+			if not _aligned(meta, row, abbrs):
+				index = nutrients._abbr_index()
+				row = row[[index[abbr] for abbr in abbrs]]
+
+			values += row
+
+		template = dict()
+
+		for abbr in abbrs:
+
+			nut = metas[0][abbr]
+			source = nut.source
+
+			for meta in metas[1:]:
+
+				other_nut = meta[abbr]
+
+				if other_nut is nut:
+					continue
+
+				# Interned names and units compare by identity, the full type
+				# test only runs, and raises, on a mismatch.
+				if other_nut.name is not nut.name or other_nut.unit is not nut.unit \
+				   or other_nut.abbr is not nut.abbr:
+					nut._Nutrient__type_test(other_nut)
+
+				if not other_nut.source <= source:
+					source = source | other_nut.source
+
+			if source is not nut.source:
+				nut = nut._with_value(nut.value)
+				nut.source = source
+
+			template[abbr] = nut
+
+		return Nutrients._from_array(template, values)
+
+	def _values_array(self):
+		"""Values of all nutrients as a float array, in insertion order.
+
+		The array is cached until the nutrients are modified.
+
+		"""
+
+		if self._values is None:
+
+			self._values = np.fromiter((nut.value for nut in self._nutrients.values()),
+									   dtype=np.float64,
+									   count=len(self._nutrients))
+
+		return self._values
+
+	def _abbr_index(self):
+		"""Position of each abbr in self._values_array, cached alike."""
+
+		if self._index is None:
+
+			self._index = {abbr: i for i, abbr in enumerate(self._meta())}
+
+		return self._index
+
+	def _use_arrays(self, other, abbrs):
+		"""Whether an operation on abbrs of self and other goes by arrays.
+
+		Always the case when one of them has no Nutrient objects built, as
+		the loop would build them; otherwise from vectorize_min_size on.
+
+		"""
+
+		return self._nutrients is None or other._nutrients is None \
+			   or len(abbrs) > vectorize_min_size
+
+	def _aligned_values(self, other, abbrs):
+		"""Values of abbrs in self and in other, as two aligned float arrays."""
+
+		# Each side is gathered unless it holds exactly abbrs, in order.
+		return (self._gathered(abbrs), other._gathered(abbrs))
+
+	def _gathered(self, abbrs):
+		"""Values of abbrs in self as a float array, in the order of abbrs."""
+
+		values = self._values_array()
+
+		if _aligned(self._meta(), values, abbrs):
+			return values
+
+		index = self._abbr_index()
+
+		return values[[index[abbr] for abbr in abbrs]]
+
+	def _merged(self, other, abbrs, values):
+		"""Nutrients object of abbrs carrying the given values.
+
+		Compatibility of each pair of nutrients is tested and their sources
+		are combined as in Nutrient.__add__, only the arithmetic on the values
+		is left to the caller.
+
+		"""
+
+		self_meta = self._meta()
+		other_meta = other._meta()
+
+		# Results sharing one template, e.g. two scalings of the same item,
+		# have nothing to test or merge. Built Nutrient objects of self are
+		# not shared, as self may still be modified.
+		if self._nutrients is None and self_meta is other_meta \
+		   and len(abbrs) == len(self_meta):
+			return Nutrients._from_array(self_meta, values, self._index)
+
+		template = dict()
+
+		for abbr in abbrs:
+
+			nut = self_meta[abbr]
+			other_nut = other_meta[abbr]
+
+			# Both sides often share the Nutrient, e.g. two scalings of the
+			# same ingredient.
+			if other_nut is not nut:
+
+				nut._Nutrient__type_test(other_nut)
+
+				source = nut._merged_source(other_nut)
+
+				if source is not nut.source:
+					nut = nut._with_value(nut.value)
+					nut.source = source
+
+			template[abbr] = nut
+
+		# The abbr index of self still applies if no abbr was dropped.
+		index = self._index if len(abbrs) == len(self_meta) else None
+
+		return Nutrients._from_array(template, values, index)
+
+	def _with_values(self, values):
+		"""Nutrients object with the same nutrients as self but new values."""
+
+		if self._nutrients is None:
+			template = self._template
+		else:
+			# Copied, as self may still be modified.
+			template = dict(self._nutrients)
+
+		return Nutrients._from_array(template, values, self._index)
+
+	@staticmethod
+	def _from_array(template, values, index=None):
+		"""Nutrients object holding values, with the metadata of template.
+
+		template maps each abbr to a Nutrient object carrying the name,
+		unit, abbr and source of the result, values is the float array of
+		the result in the same order. No Nutrient object of the result is
+		built until its nutrients are read, see Nutrients.nutrients. index
+		may pass on an abbr index of the same order.
+
+		"""
+
+		new = Nutrients.__new__(Nutrients)
+		new._template = template
+		new._values = values
+		new._index = index
+
+		return new
+
+	@staticmethod
+	def _from_dict(nutrients):
+		"""Nutrients object holding the dict nutrients as it is.
+
+		For results of operations, which are keyed by abbr already and
+		contain Nutrient objects only, so add_nutrients is skipped.
+
+		"""
+
+		new = Nutrients.__new__(Nutrients)
+		new._nutrients = nutrients
+
+		return new
 
 	# Emulating container type behaviors
 	def __len__(self):
 
-		return len(self.nutrients)
+		return len(self._meta())
 
 	def __getitem__(self, key):
 
-		if type(key) not in [str, list]:
+		# Single abbrs are the most frequent key, tested first.
+		if type(key) == str:
+
+			return self.nutrients[key]
+
+		if type(key) != list:
 
 			raise TypeError("Indexing must come with either str or list type.")
 
-		if type(key) == str:
+		if self._nutrients is None:
 
-			return self.nutrients[key]
+			# Gather the values of the keys from the array instead of
+			# building all Nutrient objects of self.
+			template = {k: self._template[k] for k in key}
 
+			if len(template) == len(key):
+
+				index = self._abbr_index()
+
+				return Nutrients._from_array(template,
+											 self._values[[index[k] for k in key]])
+
+		nutrients = {k: self.nutrients[k] for k in key}
+
+		if len(nutrients) == len(key):
+
+			return Nutrients._from_dict(nutrients)
+
+		# Repeated keys are cumulated by add_nutrients.
 		return Nutrients(input_nutrients=[self.nutrients[k] for k in key])
 
 	def __delitem__(self, key):
 
-		if type(key) not in [str, list]:
+		if not isinstance(key, key_types):
 
 			raise TypeError("Indexing must come with either str or list type.")
 
-		if type(key) == str:
+		if isinstance(key, str):
 
 			key = [key, ]
 
 		for k in key:
 			del self.nutrients[k]
 
+		self._values = None
+		self._index = None
+
 	def __iter__(self):
 
-		return self.nutrients.__iter__()
+		return self._meta().__iter__()
 
 	def items(self):
 
@@ -897,7 +1382,7 @@ class Nutrients(object):
 
 	def keys(self):
 
-		return self.nutrients.keys()
+		return self._meta().keys()
 
 	def values(self):
 
@@ -906,18 +1391,8 @@ class Nutrients(object):
 
 	def __repr__(self):
 		"""Representation of Nutrients object."""
-		title_str = title_format_str.format(abbr='ABBR',
-										    name='NAME',
-										    value='VALUE',
-										    unit='UNIT')
-
-		entry_str = "".join([entry_format_str.format(abbr=nut.abbr,
-												     name=nut.name,
-												     value=nut.value,
-												     unit=nut.unit) 
-							 for nut in self.nutrients.values()])
 
-		return title_str + entry_str
+		return title_str + "".join(map(_nutrient_row, self.nutrients.values()))
 
 
 # Composite class for ingredients and meals
@@ -983,15 +1458,41 @@ class Component(object):
 
 	"""
 
+	# Components are created in large numbers when baskets and meals are
+	# built, slots keep them small and make attribute access cheaper.
+	# Nutrients are stored in _nutrients behind the nutrients property, so
+	# that composites can compute them lazily.
+	__slots__ = ('name', 'value', 'unit', 'children', '_nutrients', 'meta')
+
 	def __init__(self, name="unknown"):
 
 		self.name = name
 		self.value = 0
 		self.unit = 'g'
-		self.children = OrderedDict()
+		self.children = dict()
 		self.nutrients = Nutrients()
 		self.meta = dict()
 
+	@property
+	def nutrients(self):
+
+		return self._nutrients
+
+	@nutrients.setter
+	def nutrients(self, nutrients):
+
+		self._nutrients = nutrients
+
+	@property
+	def _collection(self):
+		"""Collection of the component, as in meta, None if not given.
+
+		Read-only, set it with insert_meta.
+
+		"""
+
+		return self.meta.get('collection')
+
 	def __identity_check(self, other):
 
 		"""Test the identity between components"""
@@ -1017,7 +1518,7 @@ class Component(object):
 			   added value. 
 
 			*. if two IngredientComponent objects are not the same, in terms
-			   of meta information, a BasketComponent with children as a OrderedDict 
+			   of meta information, a BasketComponent with children as a dict 
 			   consisting of those two Ingredient Components.
 
 		*. BasketComponent: 
@@ -1028,7 +1529,7 @@ class Component(object):
 			   BasketComponent.
 
 		*. MealComponent:
-			*. A BasketComponent is returned with children as a OrderedDict 
+			*. A BasketComponent is returned with children as a dict 
 			   consisting of the IngredientComponent and the MealComponent.
 
 		Parameters
@@ -1125,6 +1626,8 @@ class IngredientComponent(Component):
 
 	"""
 
+	__slots__ = ()
+
 	def __init__(self, name, value, nutrients, unit='g', meta=dict()):
 
 		Component.__init__(self, name)
@@ -1144,7 +1647,7 @@ class IngredientComponent(Component):
 			   added value. 
 
 			*. if two IngredientComponent objects are not the same, in terms
-			   of meta information, a BasketComponent with children as a OrderedDict 
+			   of meta information, a BasketComponent with children as a dict 
 			   consisting of those two Ingredient Components.
 
 		*. BasketComponent: 
@@ -1155,7 +1658,7 @@ class IngredientComponent(Component):
 			   BasketComponent.
 
 		*. MealComponent:
-			*. A BasketComponent is returned with children as a OrderedDict 
+			*. A BasketComponent is returned with children as a dict 
 			   consisting of the IngredientComponent and the MealComponent.
 
 		Parameters
@@ -1171,31 +1674,40 @@ class IngredientComponent(Component):
 
 		"""
 
+		# One lookup on the exact class of other, see _ingredient_adders.
+		adder = _ingredient_adders.get(type(other))
+
+		if adder is not None:
+			return adder(self, other)
+
 		if not issubclass(type(other), Component) :
 			raise TypeError("Second argument not a sub-Component object")
 
-		if type(other) == IngredientComponent:
-			if self.meta == other.meta \
-			   and self.name == other.name \
-			   and self.unit == other.unit:
-
-				return IngredientComponent(name=self.name,
-										   value=self.value+other.value,
-										   nutrients=self.nutrients+other.nutrients,
-										   unit=self.unit,
-										   meta=self.meta)
-			else:
+	def _add_ingredient(self, other):
 
-				return BasketComponent(name='MyBasket',
-									   children=[self, other])
+		if self.meta == other.meta \
+		   and self.name == other.name \
+		   and self.unit == other.unit:
 
-		elif type(other) == BasketComponent:
-			return BasketComponent(name='MyBasket',
-								   children=[self, *other.children.values()])
+			return IngredientComponent(name=self.name,
+									   value=self.value+other.value,
+									   nutrients=self.nutrients+other.nutrients,
+									   unit=self.unit,
+									   meta=self.meta)
+		else:
 
-		elif type(other) == MealComponent:
-			return BasketComponent(name='MyBasket',
-								   children=[self, other])
+			return BasketComponent._from_children(name='MyBasket',
+												  children=[self, other])
+
+	def _add_basket(self, other):
+
+		return BasketComponent._from_children(name='MyBasket',
+											  children=[self, *other.children.values()])
+
+	def _add_meal(self, other):
+
+		return BasketComponent._from_children(name='MyBasket',
+											  children=[self, other])
 
 	def sub(self, other):
 		"""Subtraction of another IngredientComponent of same kind
@@ -1260,7 +1772,7 @@ class IngredientComponent(Component):
 
 		"""
 
-		if type(other) not in [int, float]:
+		if not isinstance(other, scalar_types):
 			raise ValueError("Must be multiplied with a scalar.")
 
 		assert (other >= 0), "Scalar must be equal or larger than zero!"
@@ -1309,7 +1821,7 @@ class IngredientComponent(Component):
 
 		"""
 
-		if type(other) in [int, float]:
+		if isinstance(other, scalar_types):
 
 			assert (other > 0), "Scalar must be larger than zero!"
 
@@ -1343,22 +1855,28 @@ class IngredientComponent(Component):
 
 	def __getitem__(self, key):
 
+		getter = self._getitem_str if isinstance(key, str) else self._getitem_list
 
-		if type(key) not in [str, list]:
+		return getter(key)
 
-			raise TypeError("Indexing must come with either str or list type.")
+	def _getitem_str(self, key):
+		"""Single nutrient indexing, returns the Nutrient object."""
 
-		if type(key) == str:
+		return self.nutrients[key]
 
-			return self.nutrients[key]
+	def _getitem_list(self, keys):
+		"""Multiple nutrients indexing, returns a sliced IngredientComponent."""
 
-		else:
-			return IngredientComponent(name=self.name,
-									   value=self.value,
-									   nutrients=self.nutrients[key],
-									   unit=self.unit,
-									   meta=self.meta
-									   )
+		if not isinstance(keys, list):
+
+			raise TypeError("Indexing must come with either str or list type.")
+
+		return IngredientComponent(name=self.name,
+								   value=self.value,
+								   nutrients=self.nutrients[keys],
+								   unit=self.unit,
+								   meta=self.meta
+								   )
 
 	def __delitem__(self, key):
 
@@ -1394,29 +1912,70 @@ class IngredientComponent(Component):
 			   self.nutrients.__repr__()
 
 
+def iflatten(AggComponent):
+	"""Generator of the leaf components of AggComponent, depth first.
+
+	An explicit stack replaces recursion, so deeply nested meals take a
+	single frame. Children are pushed in reverse to be visited in order.
+
+	"""
+
+	stack = [AggComponent]
+
+	while stack:
+
+		component = stack.pop()
+
+		if component.children:
+			stack.extend(reversed(component.children.values()))
+		else:
+			yield component
+
 def flatten(AggComponent):
 	"Helper function for flattening BasketComponent and MealComponent."
 
-	children = []
+	return list(iflatten(AggComponent))
 
-	if len(AggComponent.children) == 0:
-		children.append(AggComponent)
 
-	else:
-		for child in AggComponent.children.values():
-			children.extend(flatten(child))
+def _recipe_row(index, name, value, unit, db):
+	"Helper function for a recipe row, same layout as recipe_title_format_str."
 
-	return children
+	return f"{index:<5} {value:<10} {unit:<5s} {db:10s} {name: <20s}\n"
 
 
 class BasketComponent(Component):
 
+	# The value is stored in _value behind the value property, so that it
+	# is summed lazily like the nutrients, see update_attr. _version changes
+	# with the children, see MealComponent.flatten.
+	__slots__ = ('_value', '_version')
+
 	def __init__(self, name, children=list(), unit='g'):
 
 		Component.__init__(self, name)
 		self.unit = unit
 		self.add_children(children)
 
+	@classmethod
+	def _from_children(cls, name, children, unit='g'):
+		"""Create a component from a list of children known to be valid.
+
+		Used for the results of algebraic operations, where the children
+		are already components, so __init__ and the type check of
+		add_children are skipped.
+
+		"""
+
+		new = cls.__new__(cls)
+		new.name = name
+		new.unit = unit
+		new.meta = dict()
+		new.children = dict()
+		new._insert_children(children)
+		new.update_attr()
+
+		return new
+
 	def add_children(self, children):
 		"""Insert ingredients into the Basket object.
 
@@ -1433,14 +1992,20 @@ class BasketComponent(Component):
 		
 		"""
 
-		if type(children) not in [IngredientComponent, MealComponent, list]:
+		if not isinstance(children, child_types):
 
 			raise TypeError("Input type must be in IngredientComponent, MealComponent or list")
 
-		if type(children) != list:
+		if not isinstance(children, list):
 
 			children = [children, ]
 
+		self._insert_children(children)
+		self.update_attr()
+
+	def _insert_children(self, children):
+		"Insert a list of children, cumulating those with existing names."
+
 		for child in children:
 
 			if child.name in self.children:
@@ -1452,21 +2017,69 @@ class BasketComponent(Component):
 				# of the same type. 
 				self.children[child.name] = child
 
-		self.update_attr()
-
 	def compute_nutrition(self):
 		"Intersect addition is used implicitly."
 
-		self.nutrients = sum([child.nutrients for child in self.children.values()])
+		nutrients = [child.nutrients for child in self.children.values()]
+
+		if len(nutrients) >= sum_many_min_size \
+		   and all(isinstance(nuts, Nutrients) for nuts in nutrients):
+
+			self.nutrients = Nutrients.sum_many(nutrients)
+
+		else:
+
+			# Start from the first child rather than 0, no need for __radd__.
+			self.nutrients = sum(nutrients[1:], nutrients[0]) if nutrients else 0
 
 	def compute_value(self):
 
-		self.value = sum([child.value for child in self.children.values()])
+		self.value = sum(child.value for child in self.children.values())
+
+	@property
+	def value(self):
+		"""Value summed over the children, computed on first access."""
+
+		if self._value is None:
+			self.compute_value()
+
+		return self._value
+
+	@value.setter
+	def value(self, value):
+
+		self._value = value
+
+	@property
+	def nutrients(self):
+		"""Nutrients summed over the children.
+
+		The sum is computed on first access after the children changed, so
+		intermediate baskets of chained operations never pay for it.
+
+		"""
+
+		if self._nutrients is None:
+			self.compute_nutrition()
+
+		return self._nutrients
+
+	@nutrients.setter
+	def nutrients(self, nutrients):
+
+		self._nutrients = nutrients
 
 	def update_attr(self):
+		"""Mark the value and nutrients for recomputation.
+
+		Both are summed over the children on their next access only, so
+		adding children one by one costs a single summation.
+
+		"""
 
-		self.compute_nutrition()
-		self.compute_value()
+		self._value = None
+		self._nutrients = None
+		self._version = next(_basket_versions)
 
 	def remove_child(self, index):
 		"""Remove child with index, no regret here."""
@@ -1483,13 +2096,13 @@ class BasketComponent(Component):
 		if not issubclass(type(other), Component) :
 			raise TypeError("Second argument not a sub-Component object")
 
-		if type(other) in [IngredientComponent, MealComponent]:
-			return BasketComponent(name='MyBasket',
-								   children=[*self.children.values(), other])
+		if isinstance(other, (IngredientComponent, MealComponent)):
+			return BasketComponent._from_children(name='MyBasket',
+												  children=[*self.children.values(), other])
 
 		elif type(other) == BasketComponent:
-			return BasketComponent(name='MyBasket',
-								   children=[*self.children.values(), *other.children.values()])
+			return BasketComponent._from_children(name='MyBasket',
+												  children=[*self.children.values(), *other.children.values()])
 
 
 	def __add__(self, other):
@@ -1501,32 +2114,47 @@ class BasketComponent(Component):
 		pass
 
 	def __mul__(self, scalar):
-		
-		if type(scalar) not in [int, float]:
+		"""Multiplication of every child with a scalar.
+
+		The result has the class of self, so MealComponent objects stay
+		MealComponent objects.
+
+		"""
+
+		if not isinstance(scalar, scalar_types):
 			raise ValueError("Must be multiplied with a scalar.")
 
 		assert (scalar >= 0), "Scalar must be equal or larger than zero!"
 
-		children = [child * scalar for child in self.children.values()]
+		new = self._from_children(name=self.name,
+								  children=[child * scalar for child in self.children.values()])
 
-		return BasketComponent(name=self.name,
-							   children=children)
+		# The sum over the scaled children is the scaled sum: if the sum of
+		# self is known, one array operation replaces summing all children.
+		if self._nutrients is not None:
+			new._nutrients = self._nutrients * scalar
+
+		return new
 
 	def __rmul__(self, scalar):
 
 		return self.__mul__(scalar)
 
 	def __truediv__(self, scalar):
+		"""Division of every child by a scalar, see __mul__."""
 
-		if type(scalar) not in [int, float]:
+		if not isinstance(scalar, scalar_types):
 			raise ValueError("Must be multiplied with a scalar.")
 
 		assert (scalar > 0), "Scalar must be larger than zero!"
 
-		children = [child / scalar for child in self.children.values()]
+		new = self._from_children(name=self.name,
+								  children=[child / scalar for child in self.children.values()])
+
+		if self._nutrients is not None:
+			new._nutrients = self._nutrients / scalar
 
-		return BasketComponent(name=self.name,
-							   children=children)
+		return new
 
 	def __len__(self):
 
@@ -1538,12 +2166,12 @@ class BasketComponent(Component):
 		.loc(key) can be used for children selection.
 		"""
 
-		if type(key) not in [str, list]:
+		if not isinstance(key, key_types):
 
 			raise TypeError("Input key must be str or list.")
 
 
-		if type(key) == str:
+		if isinstance(key, str):
 
 
 			return self.children[key]
@@ -1551,24 +2179,38 @@ class BasketComponent(Component):
 		else:
 
 
-			return BasketComponent(name=self.name,
-								   unit=self.unit,
-								   children=[self.children[k] for k in key]
-								   )
+			return BasketComponent._from_children(name=self.name,
+												  unit=self.unit,
+												  children=[self.children[k] for k in key]
+												  )
 
 	def __getitem__(self, key):
 
-		if type(key) not in [str, list]:
+		getter = self._getitem_str if isinstance(key, str) else self._getitem_list
+
+		return getter(key)
+
+	def _getitem_str(self, key):
+		"""Single nutrient indexing, applied on every child."""
+
+		return self._getitem_list([key, ])
+
+	def _getitem_list(self, keys):
+		"""Multiple nutrients indexing, applied on every child."""
+
+		if not isinstance(keys, list):
 
 			raise TypeError("Input key must be str or list.")
 
-		if type(key) == str:
+		new = BasketComponent._from_children(name=self.name,
+											 unit=self.unit,
+											 children = [child[keys] for child in self.children.values()])
 
-			key = [key, ]
+		# The selection of a known sum is the sum of the selections.
+		if isinstance(self._nutrients, Nutrients):
+			new._nutrients = self._nutrients[keys]
 
-		return BasketComponent(name=self.name,
-							   unit=self.unit,
-							   children = [child[key] for child in self.children.values()])
+		return new
 
 	def __delitem__(self, key):
 
@@ -1607,9 +2249,7 @@ class BasketComponent(Component):
 		"Simply create a meal object now, no recipes required."
 		"This should be the only way to create a MealComponent object."
 
-		return MealComponent(name=name,
-							 children=list(self.children.values()),
-							 unit=self.unit)
+		return MealComponent._from_basket(self, name)
 
 	def __repr__(self):
 
@@ -1623,13 +2263,12 @@ class BasketComponent(Component):
 														  db="COLLECTION"
 														  )
 
-		recipe_entry_str = ''.join([recipe_title_format_str.format(index=i,
-													 	   name=child.name,
-													       value=child.value,
-													       unit=child.unit,
-													       db=child.meta['collection']
-													      )
-							for i, child in enumerate(self.children.values())])
+		# Collect the row fields once and feed the formatted rows straight
+		# into join, no intermediate list of strings is built.
+		rows = ((i, child.name, child.value, child.unit, child._collection or '')
+				for i, child in enumerate(self.children.values()))
+		recipe_entry_str = ''.join(_recipe_row(i, name, value, unit, db)
+								   for i, name, value, unit, db in rows)
 
 		return name_str + value_str + recipe_title_str \
 			   + recipe_entry_str + '\n' + self.nutrients.__repr__()
@@ -1637,6 +2276,9 @@ class BasketComponent(Component):
 
 class MealComponent(BasketComponent):
 
+	# _flat caches the leaves found by flatten, see there.
+	__slots__ = ('_flat', )
+
 	def __init__(self, 
 				 name, 
 				 children,
@@ -1647,6 +2289,29 @@ class MealComponent(BasketComponent):
 		BasketComponent.__init__(self, name, children, unit)
 		self.meta = meta
 
+	@classmethod
+	def _from_basket(cls, basket, name):
+		"""Create a MealComponent with the children of a BasketComponent.
+
+		The aggregated value and nutrients of the basket are reused as they
+		are, so __init__ is skipped instead of summing the children again.
+		The children mapping is copied so later changes on either side are
+		not shared.
+
+		"""
+
+		meal = cls.__new__(cls)
+		meal.name = name
+		meal._value = basket._value
+		meal.unit = basket.unit
+		meal.children = dict(basket.children)
+		meal._nutrients = basket._nutrients
+		meal.meta = dict()
+		meal._version = next(_basket_versions)
+		meal._flat = None
+
+		return meal
+
 	def add(self, other):
 
 		"Only for ingredient-ingredient summation for now"
@@ -1654,59 +2319,63 @@ class MealComponent(BasketComponent):
 			raise TypeError("Second argument not a sub-Component object")
 
 		if type(other) == IngredientComponent:
-			return BasketComponent(name='MyBasket',
-								   children=[self, other])
+			return BasketComponent._from_children(name='MyBasket',
+												  children=[self, other])
 
 		elif type(other) == BasketComponent:
-			return BasketComponent(name='MyBasket',
-								   children=[self, *other.children.values()])
+			return BasketComponent._from_children(name='MyBasket',
+												  children=[self, *other.children.values()])
 
 		elif type(other) == MealComponent:
-			return BasketComponent(name='MyBasket',
-								   children=[self, other])
+			return BasketComponent._from_children(name='MyBasket',
+												  children=[self, other])
 	def __sub__(self, other):
 
 		pass
 
-	def __mul__(self, scalar):
-		
-		if type(scalar) not in [int, float]:
-			raise ValueError("Must be multiplied with a scalar.")
-
-		assert (scalar >= 0), "Scalar must be equal or larger than zero!"
-
-		children = [child * scalar for child in self.children.values()]
+	def __add__(self, other):
 
-		return MealComponent(name=self.name,
-							   children=children)
+		return self.add(other)
 
-	def __rmul__(self, scalar):
 
-		return self.__mul__(scalar)
+	def update_attr(self):
 
-	def __truediv__(self, scalar):
+		BasketComponent.update_attr(self)
+		self._flat = None
 
-		if type(scalar) not in [int, float]:
-			raise ValueError("Must be multiplied with a scalar.")
+	def flatten(self):
+		"""Flatten the meal into a new MealComponent of ingredients only.
 
-		assert (scalar > 0), "Scalar must be larger than zero!"
+		The leaves are cached with the version of every basket nested in
+		the meal, and found again only once one of them has changed, see
+		update_attr. Children mappings modified directly rather than through
+		the component methods are not noticed. A new MealComponent is built
+		on every call, so the result may be modified by the caller.
+		"""
 
-		children = [child / scalar for child in self.children.values()]
+		if self._flat is None \
+		   or any(basket._version != version for basket, version in self._flat[1]):
 
-		return MealComponent(name=self.name,
-							   children=children)
+			leaves = []
+			versions = []
+			stack = list(reversed(self.children.values()))
 
-	def __add__(self, other):
+			while stack:
 
-		return self.add(other)
+				component = stack.pop()
 
+				if isinstance(component, BasketComponent):
+					versions.append((component, component._version))
 
-	def flatten(self):
+				if component.children:
+					stack.extend(reversed(component.children.values()))
+				else:
+					leaves.append(component)
 
-		children = flatten(self)
+			self._flat = (leaves, versions)
 
 		return MealComponent(name=self.name,
-							 children=children,
+							 children=list(self._flat[0]),
 							 unit=self.unit,
 							 meta=self.meta)
 
@@ -1719,13 +2388,60 @@ class MealComponent(BasketComponent):
 		out_dict['name'] = self.name
 		out_dict['value'] = self.value
 		out_dict['unit'] = self.unit
+		# Entries are built inline rather than by a helper call per child.
+		out_dict['materials'] = [{'name': child.name,
+								  'cook_amt': child.value,
+								  'meta': child.meta}
+								 for child in self.children.values()]
+
+		return out_dict
+
+	def scaled_to_dict(self, scalar):
+		"""Dictionary of the meal multiplied with a scalar.
+
+		Same output as (self * scalar).to_dict(), but written in a single
+		pass over the children, without building the scaled MealComponent
+		and its nutrients. Prefer this when only the dict is needed.
+
+		Parameters
+		----------
+		scalar : float or int
+			The scalar value to the multiplied with.
+
+		Returns
+		-------
+		dict
+			The dict of the scaled meal, as given by to_dict.
+
+		"""
+
+		if not isinstance(scalar, scalar_types):
+			raise ValueError("Must be multiplied with a scalar.")
+
+		assert (scalar >= 0), "Scalar must be equal or larger than zero!"
+
+		out_dict = dict()
+
+		out_dict['name'] = self.name
+		out_dict['value'] = self.value * scalar
+		out_dict['unit'] = self.unit
 		out_dict['materials'] = [{'name': child.name,
-								  'cook_amt' : child.value,
-								  'meta' : child.meta} for child in self.children.values()]
+								  'cook_amt': child.value * scalar,
+								  'meta': child.meta}
+								 for child in self.children.values()]
 
 		return out_dict
 
 
+# Types accepted as children by BasketComponent.add_children.
+child_types = (IngredientComponent, MealComponent, list)
+
+# IngredientComponent.add, by exact class of the other component.
+_ingredient_adders = {IngredientComponent: IngredientComponent._add_ingredient,
+					  BasketComponent: IngredientComponent._add_basket,
+					  MealComponent: IngredientComponent._add_meal}
+
+
 
 
 
@@ -2,23 +2,363 @@
 A simple draft for experimenting with a database construction.
 """
 import os
+import re
+import sys
+import csv
+import logging
+import functools
+from collections import OrderedDict
 import pymongo
-import bson
+import pymongo.errors
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 import numpy as np
-import pandas as pd
 
 from .composite import *
 from .loader import *
 
+logger = logging.getLogger(__name__)
+
 nut_dict_file = "{root}/ragdoll/NUTR_DEF_more.csv".format(root=os.getcwd())
-nut_dict_df = pd.read_csv(nut_dict_file, keep_default_na=False)
+
+
+def _nutrient_lookups(sources):
+    """dict of source and its lookup, read from nut_dict_file in one pass.
+
+    Each lookup is a dict of (name, unit) in the source and (code, name,
+    unit, abbr), replacing a scan of the nutrient dictionary per nutrient;
+    as with the scan, the first matching row wins. Names, units and abbrs
+    are interned once here, so all nutrients built from documents share
+    them instead of the strings of each document. Only point lookups are
+    needed, so the csv module is enough and no rows are kept.
+
+    """
+
+    lookups = {source : dict() for source in sources}
+
+    with open(nut_dict_file, newline='', encoding='utf-8') as f:
+
+        for row in csv.DictReader(f):
+
+            code = int(row['code'])
+            abbr = sys.intern(row['abbr'])
+
+            for source, lookup in lookups.items():
+
+                name = sys.intern(row["name_{}".format(source)])
+                unit = sys.intern(row["unit_{}".format(source)])
+                lookup.setdefault((name, unit), (code, name, unit, abbr))
+
+    return lookups
+
+nut_lookup = _nutrient_lookups(("USDA", "Zh", "Foodmate"))
+
+# Nutrient objects shared as templates by all items built from documents,
+# keyed by (col_name, name, unit), plus abbr for Foodmate documents, see
+# Nutrients.from_values.
+nut_templates = dict()
+
+def _object_id(item_id):
+    "ObjectId of item_id, given as str or ObjectId already."
+
+    if isinstance(item_id, ObjectId):
+        return item_id
+
+    return ObjectId(item_id)
+
+def _own_meta(component):
+    "Give component and all components nested in it their own meta dict."
+
+    stack = [component]
+
+    while stack:
+
+        component = stack.pop()
+        component.meta = dict(component.meta)
+
+        if component.children:
+            stack.extend(component.children.values())
+
+# Entries kept by each cache of a MongoDB instance, see _LRUCache.
+cache_size = 4096
+
+class _LRUCache(OrderedDict):
+    "dict keeping only the maxsize most recently used entries."
+
+    def __init__(self, maxsize):
+
+        self.maxsize = maxsize
+        OrderedDict.__init__(self)
+
+    def get(self, key, default=None):
+
+        if key not in self:
+            return default
+
+        self.move_to_end(key)
+        return OrderedDict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+
+        OrderedDict.__setitem__(self, key, value)
+        self.move_to_end(key)
+
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+# Fields read by the constructors of RetrieveItemVisitor, per collection.
+# Everything else of a document (measures, footnotes, ...) is left on the
+# server; collections not listed are fetched whole.
+item_projections = {"USDA" : {'name.long' : 1,
+                              'nutrients.name' : 1,
+                              'nutrients.value' : 1,
+                              'nutrients.units' : 1},
+                    "FM" : {'name.long' : 1,
+                            'nutrients.name' : 1,
+                            'nutrients.value' : 1,
+                            'nutrients.unit' : 1,
+                            'nutrients.abbr' : 1},
+                    "DIY" : {'name' : 1,
+                             'materials.name' : 1,
+                             'materials.meta' : 1,
+                             'materials.cook_amt' : 1}}
+
+
+# Documents per batch of retrieve_list results, so that large results come
+# in a few round trips rather than the driver's default batches.
+list_batch_size = 1000
+
+# Collection holding the searched fields of all collections, see
+# MongoDB.refresh_view.
+view_name = '_nut_index'
+
+# Case insensitive comparison of names (strength 2 ignores case only), used
+# by the name index and the exact name search of retrieve_list.
+name_collation = {'locale' : 'en', 'strength' : 2}
+
+# Results of retrieve_list are left undecoded, as read-only mappings whose
+# fields are decoded when accessed, e.g. doc['name']['long'].
+list_codec_options = CodecOptions(document_class=RawBSONDocument)
+
+# Words of a name, as stored in name.tokens of the view (see
+# MongoDB.refresh_view) and searched by viaNameTokens; the same pattern is
+# used by the server and here.
+name_token_pattern = r"[^\s,;:()/]+"
+
+
+# Query clauses of the selector keys of MongoDB.retrieve_list, built once
+# here rather than as closures on every call.
+
+# Escaped regex of each searched word; the same words come up again and
+# again, e.g. while a name is typed.
+_word_pattern = functools.lru_cache(maxsize=4096)(re.escape)
+
+def viaName(str):
+
+    '''
+    Fuzzy search for name string matching (case insensitive).
+
+    For English fuzzy search, insert string seperated with space. eg: 'Butter salt'
+        Generated query: 
+        {'$and': [{'name.long': {'$regex': 'Butter', '$options': 'i'}},
+                  {'name.long': {'$regex': 'salt', '$options': 'i'}}]}
+    Return: any object whose name contains all keywords in any order.
+    Chinese fuzzy search not defined yet.
+
+    TODO: 
+    Search suggestions: split sentence into words and compare words with high frequency dictionary, 
+        give close words search when original word is not available.
+
+    '''
+
+    # One plain regex per word rather than a single pattern of
+    # lookaheads, which backtracks over the whole name of every
+    # document. Words are escaped, so they are matched literally.
+    path = 'name.long' 
+    query = {}
+    query['$and'] = [{path : {'$regex' : _word_pattern(word), '$options' : 'i'}}
+                     for word in str.split()]
+
+    return query
+
+
+def viaText(str):
+
+    '''
+    Same search as viaName, with whole words, served by the text index on
+    name.long (see MongoDB text_search) instead of a regex scan of every
+    document. eg: 'Butter salt'
+        Generated query: {'$text': {'$search': '"Butter" "salt"'}}
+    '''
+
+    # Each word quoted, so that all of them must be matched.
+    return {'$text': {'$search': ' '.join('"{}"'.format(word)
+                                          for word in str.split())}}
+
+
+def viaNameTokens(str):
+
+    '''
+    Same search as viaText, on the view: whole words, in any order, served
+    by the index on the lowercased words of names. eg: 'Butter salt'
+        Generated query: {'name.tokens': {'$all': ['butter', 'salt']}}
+    '''
+
+    tokens = re.findall(name_token_pattern, str.lower())
+
+    # A single word is a plain equality on the multikey index.
+    if len(tokens) == 1:
+        return {'name.tokens' : tokens[0]}
+
+    return {'name.tokens' : {'$all' : tokens}}
+
+
+def viaNamePrefix(str):
+
+    '''
+    Search for names starting with str (case insensitive). eg: 'Butter, s'
+        Generated query: {'name.long': {'$regex': '^Butter,\\ s', '$options': 'i'}}
+    '''
+
+    return {'name.long' : {'$regex' : '^' + _word_pattern(str), '$options' : 'i'}}
+
+
+def viaLowerPrefix(str):
+
+    '''
+    Same search as viaNamePrefix, on the view: an anchored regex without
+    'i' on the lowercased name, served by its index as a range scan.
+        Generated query: {'name.long_lc': {'$regex': '^butter,\\ s'}}
+    '''
+
+    return {'name.long_lc' : {'$regex' : '^' + _word_pattern(str.lower())}}
+
+
+def viaRange(nuts, fuzzySearch=True, fltPct=0.1):
+    
+    # DIY contains materials not nutrients, not available right now
+
+    '''
+    Query example: 
+    cur = db.USDA.find({'nutrients': { '$all': [{ '$elemMatch' : {'abbr' : tag1, 'value' : val1}},
+                                                { '$elemMatch' : {'abbr' : tag2, 'value' : val2}}
+                                                ]}},
+                       {'_id' : 1, 'nutrients' : 1})
+
+    Fuzzy search enabled by default for accurate values.
+    fltPct: floating value (percentage).
+    '''
+
+    query = {}
+    query['nutrients'] = {}
+    query['nutrients']['$all'] = []
+
+    for nutInfo in nuts:
+        new_nutInfo = nutInfo.copy()
+        val = new_nutInfo['value']
+        
+        # range (only support a valid range eg [10, 20] yet)
+        if type(val) == list:
+            new_nutInfo['value'] = {'$gt':val[0], '$lt':val[1]}
+        # single value
+        elif type(val) == int or type(val) == float:
+            if fuzzySearch:
+                new_nutInfo['value'] = {'$gt':(1-fltPct)*val, '$lt':(1+fltPct)*val}
+        else:
+            raise Exception('Insert a value or a range to search.')
+        
+        subdict = {}
+        subdict['$elemMatch'] = new_nutInfo
+        query['nutrients']['$all'].append(subdict.copy())
+
+    # The index on (nutrients.abbr, nutrients.value) is scanned for
+    # the first clause of $all only, the others filter what it
+    # returns: put the narrowest value ranges first.
+    query['nutrients']['$all'].sort(key=rangeWidth)
+
+    return query
+
+
+def rangeWidth(subdict):
+
+    '''
+    Width of the value range of an $elemMatch clause, relative to its
+    upper bound; 0 for an exact value.
+    '''
+
+    val = subdict['$elemMatch']['value']
+    if type(val) != dict:
+        return 0
+    return (val['$lt'] - val['$gt']) / max(abs(val['$lt']), abs(val['$gt']), 1e-9)
+
+
+def viaExactName(str):
+
+    '''
+    Search for a whole name (case insensitive). eg: 'Butter, salted'
+        Generated query: {'name.long': 'Butter, salted'}
+    Compared under name_collation, so served by the name index
+    rather than a regex scan.
+    '''
+
+    return {'name.long' : str}
+
+
+def viaTag(reqDict):
+
+    '''
+    eg: {'group':'乳类', 'tag':'高脂肪'}
+    '''
+    
+    return reqDict
+
+
+# Clause builder of each selector key, viaTag for any other key; names are
+# searched with the text index when there is one, and with the indexed
+# fields of the view when searching the view.
+query_handlers = {'name' : viaName,
+                  'name_prefix' : viaNamePrefix,
+                  'range' : viaRange,
+                  'exact_name' : viaExactName}
+text_query_handlers = dict(query_handlers, name=viaText)
+view_query_handlers = dict(query_handlers, name=viaNameTokens,
+                           name_prefix=viaLowerPrefix)
+
+
+def queryGen(selector, handlers=query_handlers):
+
+    queryList = []
+    for key, val in selector.items():
+        newSel = handlers.get(key, viaTag)(val)
+        if len(newSel) == 1 and '$and' in newSel:
+            # Clauses of the words join the other clauses directly.
+            queryList.extend(newSel['$and'])
+        else:
+            queryList.append(newSel)
+
+    # A single clause is matched as is, an empty selector matches
+    # everything; $and only joins several clauses.
+    if not queryList:
+        return {}
+    if len(queryList) == 1:
+        return queryList[0]
+
+    query = {}
+    query['$and'] = queryList
+
+    return query
 
 
 # Implementing an adapter
 class MongoDB(object):
     """MongoDB connection and support requests
 
-    
+    Retrieved documents and meal materials are cached per instance (see
+    retrieve_item and _material_items). Writes through this instance drop
+    the cached entries of the written items; after changes made by other
+    clients, call clear_cache.
+
     """
 
     def __init__(self, 
@@ -27,176 +367,330 @@ class MongoDB(object):
                  database="mydatabase",
                  user=None,
                  password=None,
-                 collections=['USDA','FM','shiwuku']):
+                 collections=['USDA','FM','shiwuku'],
+                 text_search=False,
+                 use_view=False):
         """Initiation with Mongodb databases
 
         Parameters
         ----------
         Refer to pymongo.MongoClient
 
+        text_search : bool
+            Search names in retrieve_list with the text index on name.long,
+            matching whole words; the index is created only then. Not
+            suited for Chinese names, which the text index does not split
+            into words. By default, names are matched by regex as
+            substrings, without index.
+        use_view : bool
+            Search in the view collection built by refresh_view rather than
+            in every collection, for selectors of name, name_prefix, range
+            and exact_name only; other keys (group, tag, ...) are not in
+            the view and are searched in the collections.
+
         """
         client = pymongo.MongoClient(host=host, port=port)
         self.database = client[database]
         if bool(user) & bool(password):
             self.database.authenticate(name=user, password=password)
 
-        col_list = self.database.collection_names()
-        if (set(collections) <= set(col_list)) == False:
-            raise Exception('Invalid database name in collections.')
+        # Only the requested names are listed by the server.
+        col_list = set(self.database.list_collection_names(filter={'name' : {'$in' : list(collections)}}))
+        missing = [col_name for col_name in collections if col_name not in col_list]
+        if missing:
+            raise Exception('Invalid database name in collections: {}.'.format(missing))
         self.collections = collections
+        self.text_search = text_search
+        self.use_view = use_view
 
+        # Documents of retrieved items, keyed by (col_name, item_id). Items
+        # referenced by many meals (salt, oil, ...) are fetched only once;
+        # components are still rebuilt per call, as they may be modified.
+        # Bounded, so a long-lived instance does not grow without limit.
+        self._doc_cache = _LRUCache(cache_size)
 
-    def retrieve_item(self, col_name, item_id):
+        # Components of meal materials, keyed as the documents. They are
+        # only read, to scale them into the children of meals, so they are
+        # shared by all meals instead of rebuilt for each; see
+        # _material_items.
+        self._material_cache = _LRUCache(cache_size)
 
-        # Use id to retrieve document of the item
-        if col_name == "USDA":
-            node = UsdaNode(col_name)
-        elif col_name == "FM":
-            node = FoodmateNode(col_name)
-        elif col_name == "DIY":
-            node = DiyNode(col_name)
 
-        node.set_id(item_id)
-        node.set_mongod(self)
-        return node.accept(RetrieveItemVisitor)
+    def ensure_indexes(self):
+        """Create the indexes used by retrieve_list, if missing
 
+        Range queries match nutrients by abbr and value with $elemMatch, a
+        compound multikey index serves them without a collection scan. Name
+        queries use a text index on name.long if text_search is set.
+        create_index does nothing when the index exists already.
 
-    def retrieve_list(self, selector):
+        Not called when connecting, as it needs write access and a round
+        trip per index: run it once as a setup step, by a user allowed to
+        create indexes.
 
-        # Use the selector to retrieve a list of documents of the item
-        # for each of the documents, format according to composite.py
-        # return the list
+        """
 
-        def viaName(str):
+        for col_name in self.collections:
+            self.__create_indexes(col_name)
 
-            '''
-            Fuzzy search for name string matching (case insensitive).
 
-            For English fuzzy search, insert string seperated with space. eg: 'Butter salt'
-                Generated query: {'name.long': {'$regex': '^(?=.*Butter)(?=.*salt).+', '$options': 'i'}}
-            Return: any object whose name contains all keywords in any order.
-            Chinese fuzzy search not defined yet.
+    def refresh_view(self):
+        """Rebuild the view collection searched by retrieve_list
 
-            TODO: 
-            Search suggestions: split sentence into words and compare words with high frequency dictionary, 
-                give close words search when original word is not available.
+        The name and nutrients of the documents of all collections are
+        copied, tagged with their collection, into one indexed collection
+        (view_name), so that a search is a single indexed query. Names are
+        stored lowercased as well (name.long_lc) and split into words
+        (name.tokens), so that name searches seek an index instead of
+        matching a regex against every name. Documents are copied as of
+        this call; call again after the collections changed. The view is
+        only searched if use_view is set.
 
-            '''
+        """
 
-            path = 'name.long' 
-            regexStr = '^'+''.join(['(?=.*'+word+')' for word in str.split(' ')])+'.+'
+        def pipelineGen(dbName):
 
-            def queryGen(str):
+            return [{'$project' : {'name.long' : 1, 'nutrients' : 1}},
+                    {'$addFields' : {'collection' : {'$literal' : dbName},
+                                     'name.long_lc' : {'$toLower' : '$name.long'}}},
+                    {'$addFields' : {'name.tokens' : {'$map' : {'input' : {'$regexFindAll' : {'input' : '$name.long_lc',
+                                                                                              'regex' : name_token_pattern}},
+                                                                'in' : '$$this.match'}}}}]
 
-                query = {}
-                query[path] = {}
-                query[path]['$regex'] = str
-                query[path]['$options'] = 'i'
-                
-                return query
+        first, *others = self.collections
+        pipeline = pipelineGen(first)
+        for dbName in others:
+            pipeline.append({'$unionWith' : {'coll' : dbName,
+                                             'pipeline' : pipelineGen(dbName)}})
+        # $out replaces the view as a whole, documents removed from the
+        # collections do not linger.
+        pipeline.append({'$out' : view_name})
 
-            query = queryGen(regexStr)
+        self.database[first].aggregate(pipeline)
+        self.__create_indexes(view_name)
+        self.database[view_name].create_index([('name.tokens', pymongo.ASCENDING)])
+        self.database[view_name].create_index([('name.long_lc', pymongo.ASCENDING)])
 
-            return query
 
+    def __create_indexes(self, col_name):
 
-        def viaRange(nutrients):
-            
-            # DIY contains materials not nutrients, not available right now
-
-            '''
-            Query example: 
-            cur = db.USDA.find({'nutrients': { '$all': [{ '$elemMatch' : {'abbr' : tag1, 'value' : val1}},
-                                                        { '$elemMatch' : {'abbr' : tag2, 'value' : val2}}
-                                                        ]}},
-                               {'_id' : 1, 'nutrients' : 1})
-            '''
-
-            def queryGen(nuts, fuzzySearch=True, fltPct=0.1):
-                '''
-                Fuzzy search enabled by default for accurate values.
-                fltPct: floating value (percentage).
-                '''
-                query = {}
-                query['nutrients'] = {}
-                query['nutrients']['$all'] = []
-
-                for nutInfo in nuts:
-                    new_nutInfo = nutInfo.copy()
-                    val = new_nutInfo['value']
-                    
-                    # range (only support a valid range eg [10, 20] yet)
-                    if type(val) == list:
-                        new_nutInfo['value'] = {'$gt':val[0], '$lt':val[1]}
-                    # single value
-                    elif type(val) == int or type(val) == float:
-                        if fuzzySearch:
-                            new_nutInfo['value'] = {'$gt':(1-fltPct)*val, '$lt':(1+fltPct)*val}
-                    else:
-                        raise Exception('Insert a value or a range to search.')
-                    
-                    subdict = {}
-                    subdict['$elemMatch'] = new_nutInfo
-                    query['nutrients']['$all'].append(subdict.copy())
-
-                return query
-
-            query = queryGen(nutrients)
-
-            return query
-
-
-        def viaTag(reqDict):
-
-            '''
-            eg: {'group':'乳类', 'tag':'高脂肪'}
-            '''
-            
-            return reqDict
+        self.__create_index(col_name,
+                            [('nutrients.abbr', pymongo.ASCENDING),
+                             ('nutrients.value', pymongo.ASCENDING)])
+        if self.text_search:
+            self.__create_index(col_name, [('name.long', pymongo.TEXT)],
+                                name='name_long_text')
+        # Named, so it does not clash with a plain index on name.long.
+        self.__create_index(col_name, [('name.long', pymongo.ASCENDING)],
+                            name='name_long_ci',
+                            collation=name_collation)
 
-        #------------------------------------------------#
 
-        def queryGen(selector):
+    def __create_index(self, col_name, keys, **kwargs):
 
-            queryList = []
-            for key, val in selector.items():
-                if key == 'name':
-                    newSel = viaName(val)
-                elif key == 'range': 
-                    newSel = viaRange(val)
-                else:
-                    newSel = viaTag(val)
-                queryList.append(newSel)
-            query = {}
-            query['$and'] = queryList
+        # An existing index on the same keys with other options or another
+        # name (e.g. a text index created by hand) is kept as it is, rather
+        # than failing the connection.
+        try:
+            self.database[col_name].create_index(keys, **kwargs)
+        except pymongo.errors.OperationFailure as e:
+            if e.code not in (85, 86):  # IndexOptionsConflict, IndexKeySpecsConflict
+                raise
+            logger.warning("Index %s on %s not created: %s", keys, col_name, e)
 
-            return query
 
-        query = queryGen(selector)
-        data = []
-        for dbName in self.collections:
-            cur = self.database[dbName].find(query,{'_id':1, 'name.long':1})
-            for doc in cur:
-                doc['collection'] = dbName
-                data.append(doc)
+    def retrieve_item(self, col_name, item_id, doc=None):
 
-        return data
+        # Use id to retrieve document of the item, unless the document is
+        # given already (see retrieve_items) or cached.
+        key = (col_name, str(item_id))
+        if doc is None:
+            doc = self._doc_cache.get(key)
+
+        node = node_classes[col_name](col_name, id=item_id, doc=doc, mongod=self)
+        item = retrievers[col_name](node)
+        self._doc_cache[key] = node.doc
+        return item
+
+
+    def retrieve_items(self, col_name, item_ids):
+        """Retrieve several items of a collection with a single query
+
+        Parameters
+        ----------
+        col_name : str
+            Collection of all items.
+        item_ids : list of str
+            Ids of the items, repeats allowed.
+
+        Returns
+        -------
+        dict of item id and retrieved component.
+
+        """
+
+        docs = {str(item_id) : self._doc_cache.get((col_name, str(item_id)))
+                for item_id in item_ids}
+
+        # Only query the documents not cached yet.
+        ids = [_object_id(item_id)
+               for item_id, doc in docs.items() if doc is None]
+        if ids:
+            # All in the first batch, rather than 101 documents and getMores.
+            cur = self.database[col_name].find({'_id': {'$in': ids}},
+                                               item_projections.get(col_name),
+                                               batch_size=len(ids))
+            docs.update({str(doc['_id']) : doc for doc in cur})
+
+        return {item_id : self.retrieve_item(col_name, item_id, docs[str(item_id)])
+                for item_id in dict.fromkeys(item_ids)}
+
+
+    def _material_items(self, col_name, item_ids):
+        """Shared components of meal materials, as given by retrieve_items
+
+        The components are cached and must not be modified.
+
+        """
+
+        items = {item_id : self._material_cache.get((col_name, str(item_id)))
+                 for item_id in item_ids}
+
+        missing = [item_id for item_id, item in items.items() if item is None]
+        if missing:
+            for item_id, item in self.retrieve_items(col_name, missing).items():
+                self._material_cache[(col_name, str(item_id))] = item
+                items[item_id] = item
+
+        return items
+
+
+    def clear_cache(self):
+        """Forget all cached documents, e.g. after changes by other clients."""
+
+        self._doc_cache.clear()
+        self._material_cache.clear()
+
+
+    def retrieve_list(self, selector, limit=0):
+
+        # Use the selector to retrieve a list of documents of the item
+        # for each of the documents, format according to composite.py
+        # return the list
+        # At most limit documents are returned, if limit is given.
+
+        def pipelineGen(dbName):
+
+            # The collection is set on the server, not per document here.
+            pipeline = [{'$match' : query},
+                        {'$project' : {'_id' : 1, 'name.long' : 1}},
+                        {'$addFields' : {'collection' : {'$literal' : dbName}}}]
+            # No collection contributes more than the limit.
+            if limit:
+                pipeline.insert(1, {'$limit' : limit})
+            return pipeline
+
+        # The view only holds the fields of its own handlers; selectors of
+        # other fields are searched in the collections.
+        use_view = self.use_view and view_query_handlers.keys() >= selector.keys()
+
+        if use_view:
+            handlers = view_query_handlers
+        elif self.text_search:
+            handlers = text_query_handlers
+        else:
+            handlers = query_handlers
+
+        query = queryGen(selector, handlers)
+
+        # Only exact names compare under the collation of the name index;
+        # $regex and $text ignore it.
+        collation = name_collation if 'exact_name' in selector else None
+
+        # A limited result comes in a single batch.
+        batch_size = limit or list_batch_size
+
+        if use_view:
+            view = self.database.get_collection(view_name,
+                                                codec_options=list_codec_options)
+            cur = view.find(query,
+                            {'_id' : 1, 'name.long' : 1, 'collection' : 1},
+                            limit=limit,
+                            batch_size=batch_size,
+                            collation=collation)
+            return list(cur)
+
+        if not self.collections:
+            return []
+
+        # A single aggregation on the first collection, the others joined
+        # with $unionWith: one round trip instead of one per collection.
+        first, *others = self.collections
+        pipeline = pipelineGen(first)
+        for dbName in others:
+            pipeline.append({'$unionWith' : {'coll' : dbName,
+                                             'pipeline' : pipelineGen(dbName)}})
+        if limit and others:
+            pipeline.append({'$limit' : limit})
+
+        collection = self.database.get_collection(first,
+                                                  codec_options=list_codec_options)
+
+        return list(collection.aggregate(pipeline,
+                                         batchSize=batch_size,
+                                         collation=collation))
 
         
 
     def insert_item(self, col_name, item):
 
-        # input item is either ingredient or meal, we treat them all the same. 
-        if col_name == "USDA":
-            node = UsdaNode(col_name)
-        elif col_name == "Foodmate":
-            node = FoodmateNode(col_name)
-        elif col_name == "DIY":
-            node = DiyNode(col_name)
+        result = inserters[col_name](self.__insert_node(col_name, item))
+        if result is not None:
+            self._evict(col_name, [result.inserted_id])
+
+        return result
+
+
+    def insert_items(self, col_name, items):
+        """Insert several items into a collection with a single bulk write
+
+        Parameters
+        ----------
+        col_name : str
+            Collection of all items.
+        items : list
+            Components to insert, serialized as by insert_item.
+
+        Returns
+        -------
+        pymongo.results.BulkWriteResult
+
+        Raises
+        ------
+        ValueError
+            If items of col_name cannot be serialized, e.g. for USDA.
+
+        """
+
+        if col_name not in serializers:
+            raise ValueError("Items cannot be inserted into {}.".format(col_name))
+
+        serialize = serializers[col_name]
+        docs = [serialize(self.__insert_node(col_name, item)) for item in items]
+
+        # Unordered, so a failing document does not stop the others.
+        try:
+            return self.database[col_name].bulk_write([pymongo.InsertOne(doc) for doc in docs],
+                                                      ordered=False)
+        finally:
+            # The driver sets the _id of each document it sends.
+            self._evict(col_name, [doc['_id'] for doc in docs if '_id' in doc])
 
-        node.set_component(item)
-        node.set_mongod(self)
-        return node.accept(InsertItemVisitor)
+
+    def __insert_node(self, col_name, item):
+
+        # input item is either ingredient or meal, we treat them all the same. 
+        return node_classes[col_name](col_name, mongod=self, component=item)
 
 
 
@@ -205,7 +699,16 @@ class MongoDB(object):
         # given an object defined as in composite.py, update the document
         # according to the specs of the particular collection.
 
-        pass
+        self._evict(item.meta.get('collection'), [item_id])
+
+
+    def _evict(self, col_name, item_ids):
+        """Drop the cached document and component of each written item"""
+
+        for item_id in item_ids:
+            key = (col_name, str(item_id))
+            self._doc_cache.pop(key, None)
+            self._material_cache.pop(key, None)
 
 
 class Visitor(object):
@@ -214,14 +717,17 @@ class Visitor(object):
 
         self.text=text
 
+    @staticmethod
     def visitUsdaNode(usda_node):
 
         pass
 
+    @staticmethod
     def visitFoodmateNode(fm_node):
 
         pass
 
+    @staticmethod
     def visitDiyNode(DiyNode):
 
         pass
@@ -230,6 +736,7 @@ class Visitor(object):
 class RetrieveItemVisitor(Visitor):
 
 
+    @staticmethod
     def visitUsdaNode(usda_node):
 
         def __ingredient_constructor(ing_doc):
@@ -237,12 +744,16 @@ class RetrieveItemVisitor(Visitor):
             name = ing_doc['name']['long']
             value = 100
             unit = 'g'
-            nutrient_list = []
 
-            for nutrient in ing_doc['nutrients']:
-                nutrient_list.append(__nutrient_constructor(nutrient))
+            # Only the values are taken from each nutrient document, the
+            # rest comes from shared templates.
+            nut_docs = ing_doc['nutrients']
+            nutrient_list = [__nutrient_template(nutrient) for nutrient in nut_docs]
+            values = np.fromiter((nutrient['value'] for nutrient in nut_docs),
+                                 dtype=np.float64,
+                                 count=len(nut_docs))
 
-            nutrients = Nutrients(input_nutrients=nutrient_list)
+            nutrients = Nutrients.from_values(nutrient_list, values)
 
             ingredient =  IngredientComponent(name=name,
                                               value=value,
@@ -257,34 +768,35 @@ class RetrieveItemVisitor(Visitor):
           
             return ingredient
 
-        def __nutrient_constructor(nut_doc):
+        def __nutrient_template(nut_doc):
 
-            
-            name = nut_doc['name']
-            value = nut_doc['value']
-            unit = nut_doc['units']
-
-            condition = (nut_dict_df["name_{}".format(usda_node.col_name)] == name) \
-                        & (nut_dict_df["unit_{}".format(usda_node.col_name)] == unit)
-            nut_info = nut_dict_df[condition]
-            code = nut_info['code'].values[0]
-            abbr = nut_info['abbr'].values[0]
-
-            return Nutrient(name=name, 
-                            value=value, 
-                            unit=unit, 
-                            abbr=abbr,
-                            source=usda_node.col_name,
-                            name_source=usda_node.col_name)
-
-        collection = usda_node.mongod.database[usda_node.col_name]
-        doc = collection.find_one({'_id': bson.objectid.ObjectId(usda_node.id)})
+            key = (usda_node.col_name, nut_doc['name'], nut_doc['units'])
+
+            if key not in nut_templates:
+
+                code, name, unit, abbr = nut_lookup[usda_node.col_name][key[1:]]
+                nut_templates[key] = Nutrient(name=name, 
+                                              value=0.0, 
+                                              unit=unit, 
+                                              abbr=abbr,
+                                              source=usda_node.col_name,
+                                              name_source=usda_node.col_name)
+
+            return nut_templates[key]
+
+        doc = usda_node.doc
+        if doc is None:
+            collection = usda_node.mongod.database[usda_node.col_name]
+            doc = collection.find_one({'_id': _object_id(usda_node.id)},
+                                      item_projections.get(usda_node.col_name))
+            usda_node.set_doc(doc)
 
         # reconstruct the ingredient component
 
         return __ingredient_constructor(doc)
 
 
+    @staticmethod
     def visitFoodmateNode(fm_node):
 
         def __ingredient_constructor(ing_doc):
@@ -292,12 +804,15 @@ class RetrieveItemVisitor(Visitor):
             name = ing_doc['name']['long']
             value = 100
             unit = 'g'
-            nutrient_list = []
 
-            for nutrient in ing_doc['nutrients']:
-                nutrient_list.append(__nutrient_constructor(nutrient))
+            # As for USDA documents, see visitUsdaNode.
+            nut_docs = ing_doc['nutrients']
+            nutrient_list = [__nutrient_template(nutrient) for nutrient in nut_docs]
+            values = np.fromiter((nutrient['value'] for nutrient in nut_docs),
+                                 dtype=np.float64,
+                                 count=len(nut_docs))
 
-            nutrients = Nutrients(input_nutrients=nutrient_list)
+            nutrients = Nutrients.from_values(nutrient_list, values)
 
             ingredient =  IngredientComponent(name=name,
                                               value=value,
@@ -312,25 +827,32 @@ class RetrieveItemVisitor(Visitor):
 
             return ingredient
 
-        def __nutrient_constructor(nut_doc):
+        def __nutrient_template(nut_doc):
+
+            # Foodmate documents carry the abbr, no lookup needed.
+            key = (fm_node.col_name, nut_doc['name'], nut_doc['unit'], nut_doc['abbr'])
 
-            name = nut_doc['name']
-            unit = nut_doc['unit']
-            value = nut_doc['value']
-            abbr = nut_doc['abbr']
+            if key not in nut_templates:
 
-            return Nutrient(name=name, 
-                            value=value, 
-                            unit=unit, 
-                            abbr=abbr,
-                            source=fm_node.col_name,
-                            name_source=fm_node.col_name)
+                nut_templates[key] = Nutrient(name=key[1], 
+                                              value=0.0, 
+                                              unit=key[2], 
+                                              abbr=key[3],
+                                              source=fm_node.col_name,
+                                              name_source=fm_node.col_name)
 
-        collection = fm_node.mongod.database[fm_node.col_name]
-        doc = collection.find_one({'_id': bson.objectid.ObjectId(fm_node.id)})
+            return nut_templates[key]
+
+        doc = fm_node.doc
+        if doc is None:
+            collection = fm_node.mongod.database[fm_node.col_name]
+            doc = collection.find_one({'_id': _object_id(fm_node.id)},
+                                      item_projections.get(fm_node.col_name))
+            fm_node.set_doc(doc)
 
         return __ingredient_constructor(doc)
 
+    @staticmethod
     def visitDiyNode(DiyNode):
         "No recipe for now."
 
@@ -339,22 +861,35 @@ class RetrieveItemVisitor(Visitor):
 
             name = meal_doc['name']
             children = list()
-            print("current doc name : {name}".format(name=name))
-            print([ingre_doc['name'] for ingre_doc in meal_doc['materials']])
+            logger.debug("current doc name : %s", name)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s", [ingre_doc['name'] for ingre_doc in meal_doc['materials']])
 
+            # Fetch the materials with one query per collection instead of
+            # one query per material.
+            item_ids = dict()
             for ingre in meal_doc['materials']:
-                print(ingre['name'])
-                print(ingre['meta'])
-                child = DiyNode.mongod.retrieve_item(ingre['meta']['collection'], 
-                                                     ingre['meta']['item_id'])
-                print("child {name} is constructed.".format(name=child.name))
-                newchild = child / child.value * ingre['cook_amt']
+                item_ids.setdefault(ingre['meta']['collection'], []) \
+                        .append(ingre['meta']['item_id'])
+
+            items = {col_name : DiyNode.mongod._material_items(col_name, ids)
+                     for col_name, ids in item_ids.items()}
+
+            for ingre in meal_doc['materials']:
+                logger.debug("%s %s", ingre['name'], ingre['meta'])
+                child = items[ingre['meta']['collection']][ingre['meta']['item_id']]
+                logger.debug("child %s is constructed.", child.name)
+                # One scaling of the shared child instead of two.
+                newchild = child * (ingre['cook_amt'] / child.value)
+                # Scaling passes on the meta dicts of the shared child; the
+                # child of this meal gets its own copies.
+                _own_meta(newchild)
                 children.append(newchild)
-            print("All children are constructed.")
+            logger.debug("All children are constructed.")
             
             meal = MealComponent(name=name,
                                  children=children)
-            print("Meal {name} is constructed.".format(name=meal.name))
+            logger.debug("Meal %s is constructed.", meal.name)
 
             # insert meta information about database
             meal.insert_meta("collection", DiyNode.col_name)
@@ -363,19 +898,21 @@ class RetrieveItemVisitor(Visitor):
 
             return meal
 
-        collection = DiyNode.mongod.database[DiyNode.col_name]
-        doc = collection.find_one({"_id" : bson.objectid.ObjectId(DiyNode.id)})
+        doc = DiyNode.doc
+        if doc is None:
+            collection = DiyNode.mongod.database[DiyNode.col_name]
+            doc = collection.find_one({"_id" : _object_id(DiyNode.id)},
+                                      item_projections.get(DiyNode.col_name))
+            DiyNode.set_doc(doc)
 
         return __meal_constructor(doc)
 
 
 
-class InsertItemVisitor(Visitor):
-
-    # def visitUsdaNode(usda_node):
-
-    #     pass
+class SerializeItemVisitor(Visitor):
+    """Documents of components, as inserted by InsertItemVisitor."""
 
+    @staticmethod
     def visitFoodmateNode(fm_node):
 
         # Decompose ingredient into reasonable format according to foodmate
@@ -388,28 +925,57 @@ class InsertItemVisitor(Visitor):
         if "source" not in ingredient.meta:
             ingredient.meta['source'] = "Analytical from ragdoll"
 
-        # Organize nutrients into dict
-        nut_dict = {"{name}({unit})".format(name=nut.name, unit=nut.unit) : nut.value\
-                    for nut in ingredient.nutrients.nutrients.values()}
+        # Organize nutrients as in FM documents: one subdocument per
+        # nutrient, with its abbr, so that the documents are read back by
+        # RetrieveItemVisitor without any name lookup, and range searches
+        # use the (nutrients.abbr, nutrients.value) index.
+        nut_list = [{"name" : nut.name,
+                     "unit" : nut.unit,
+                     "abbr" : nut.abbr,
+                     "value" : nut.value}
+                    for nut in ingredient.nutrients.nutrients.values()]
 
         # Organize out_dict
         out_dict = {"name" : ingredient.name,
                     "type" : ingredient.meta['type'],
                     "source" : ingredient.meta['source'],
-                    "nutrients" : nut_dict}
+                    "nutrients" : nut_list}
 
-        # Insert to foodmate
-        result = fm_node.mongod.database[fm_node.col_name].insert_one(out_dict)
-        print(result)
+        return out_dict
 
 
+    @staticmethod
     def visitDiyNode(DiyNode):
 
         # Decompose a meal into reasonable format according to DIY format
         meal = DiyNode.component
 
-        result = DiyNode.mongod.database[DiyNode.col_name].insert_one(meal.to_dict())
+        return meal.to_dict()
+
+
+class InsertItemVisitor(Visitor):
+
+    # def visitUsdaNode(usda_node):
+
+    #     pass
+
+    @staticmethod
+    def visitFoodmateNode(fm_node):
+
+        # Insert to foodmate
+        out_dict = SerializeItemVisitor.visitFoodmateNode(fm_node)
+        result = fm_node.mongod.database[fm_node.col_name].insert_one(out_dict)
+        print(result)
+        return result
+
+
+    @staticmethod
+    def visitDiyNode(DiyNode):
+
+        out_dict = SerializeItemVisitor.visitDiyNode(DiyNode)
+        result = DiyNode.mongod.database[DiyNode.col_name].insert_one(out_dict)
         print(result)
+        return result
 
 
 
@@ -420,14 +986,27 @@ class InsertItemVisitor(Visitor):
 
 class Node(object):
 
-    def __init__(self, col_name):
+    # A node is created for every retrieved or inserted item, including all
+    # materials of a meal; slots keep them small.
+    __slots__ = ('col_name', 'doc', 'id', 'mongod', 'component')
 
+    def __init__(self, col_name, id=None, doc=None, mongod=None, component=None):
+
+        # All set in one call, instead of one setter call per field.
         self.col_name = col_name
+        self.id = id
+        self.doc = doc
+        self.mongod = mongod
+        self.component = component
 
     def set_id(self, id):
 
         self.id = id
 
+    def set_doc(self, doc):
+
+        self.doc = doc
+
     def set_mongod(self, mongod):
 
         self.mongod = mongod
@@ -438,34 +1017,41 @@ class Node(object):
 
     def accept(self, visitor):
 
-        pass
+        # Looked up on the visitor, so overrides in subclasses are used.
+        return getattr(visitor, self._visit)(self)
 
 class UsdaNode(Node):
 
-    def __init__(self, col_name):
-
-        Node.__init__(self, col_name)
-
-    def accept(self, visitor):
-
-        return visitor.visitUsdaNode(self)
+    __slots__ = ()
+    _visit = 'visitUsdaNode'
 
 class FoodmateNode(Node):
 
-    def __init__(self, col_name): 
-
-        Node.__init__(self, col_name)
-
-    def accept(self, visitor):
-
-        return visitor.visitFoodmateNode(self)
+    __slots__ = ()
+    _visit = 'visitFoodmateNode'
 
 class DiyNode(Node):
 
-    def __init__(self, col_name):
-
-        Node.__init__(self, col_name)
-
-    def accept(self, visitor):
-
-        return visitor.visitDiyNode(self)
+    __slots__ = ()
+    _visit = 'visitDiyNode'
+
+
+# Node class of each collection. Foodmate items are retrieved from "FM" and
+# inserted into "Foodmate".
+node_classes = {"USDA" : UsdaNode,
+                "FM" : FoodmateNode,
+                "Foodmate" : FoodmateNode,
+                "DIY" : DiyNode}
+
+
+# Visit method of each collection, called directly by MongoDB instead of
+# going through Node.accept, which stays for other callers.
+retrievers = {col_name : getattr(RetrieveItemVisitor, node_class._visit)
+              for col_name, node_class in node_classes.items()}
+# Only collections whose documents can be built from components, USDA
+# items are not serialized.
+serializers = {col_name : getattr(SerializeItemVisitor, node_class._visit)
+               for col_name, node_class in node_classes.items()
+               if node_class._visit in vars(SerializeItemVisitor)}
+inserters = {col_name : getattr(InsertItemVisitor, node_class._visit)
+             for col_name, node_class in node_classes.items()}
@@ -59,6 +59,31 @@ class NutrientDictionary(Dictionary):
 		self.dict_file = dict_file
 		self.dict_df = pd.read_csv(self.dict_file, keep_default_na=False)
 
+		# Row of each (name, unit), per name source; see _lookup.
+		self._lookups = dict()
+
+	def _lookup(self, name_source):
+		"""dict of (name, unit) in name_source and its row in dict_df.
+
+		Built once per name source, so that translating a nutrient is a
+		dict lookup instead of a scan of two columns. As with the scan,
+		the first matching row wins.
+
+		"""
+
+		if name_source not in self._lookups:
+
+			names = self.dict_df["name_{}".format(name_source)].tolist()
+			units = self.dict_df["unit_{}".format(name_source)].tolist()
+
+			lookup = dict()
+			for row, key in enumerate(zip(names, units)):
+				lookup.setdefault(key, row)
+
+			self._lookups[name_source] = lookup
+
+		return self._lookups[name_source]
+
 	def translate(self, nutrient, target):
 		"""translate current nutrient to target format
 
@@ -81,15 +106,13 @@ class NutrientDictionary(Dictionary):
 		cur_name = nutrient.name
 		cur_unit = nutrient.unit
 
-		# Extract the line of information for this nutrient
-		condition = (self.dict_df["name_{}".format(cur_name_source)] == cur_name) \
-					& (self.dict_df["unit_{}".format(cur_name_source)] == cur_unit)
-		nut_info = self.dict_df[condition]
+		# Locate the line of information for this nutrient
+		row = self._lookup(cur_name_source)[(cur_name, cur_unit)]
 
 		# get the new names and units
 		new_name_source = target
-		new_name = nut_info["name_{}".format(target)].values[0]
-		new_unit = nut_info["unit_{}".format(target)].values[0]
+		new_name = self.dict_df["name_{}".format(target)].values[row]
+		new_unit = self.dict_df["unit_{}".format(target)].values[row]
 
 		nutrient.name = new_name
 		nutrient.unit = new_unit
@@ -2,11 +2,22 @@
 This is a script to faciliate the construction of Human objects.
 """
 
+from types import MappingProxyType
+
 from .req import *
 
+# Default acceptable macronutrient ranges, as shares of energy. Read-only,
+# each Human gets its own copy.
+default_AMRD = MappingProxyType({"PROCNT" : 0.3,
+                                 "FAT"    : 0.2,
+                                 "CHOCDF" : 0.5})
 
 class Human(object):
 
+    # nutrients is set by get_req.
+    __slots__ = ('name', 'gender', 'age', 'height', 'weight', 'PAL', 'AMRD',
+                 'nutrients')
+
     def __init__(self, 
     			 name='test', 
     			 gender='male', 
@@ -14,9 +25,7 @@ class Human(object):
     			 height=175, 
     			 weight=68, 
     			 PAL=1.2, 
-    			 AMRD={"PROCNT" : 0.3,
-						 "FAT"    : 0.2,
-						 "CHOCDF" : 0.5}):
+    			 AMRD=None):
         """Initiate a Human object
 
         Parameters
@@ -31,6 +40,9 @@ class Human(object):
             height of the Human object, in cm.
         weight : float
             weight of the Human object, in kg.
+        AMRD : dict
+            shares of energy of "PROCNT", "FAT" and "CHOCDF"; default_AMRD
+            if not given.
 
         """
 
@@ -40,7 +52,7 @@ class Human(object):
         self.height = height
         self.weight = weight
         self.PAL = PAL
-        self.AMRD = AMRD
+        self.AMRD = dict(default_AMRD if AMRD is None else AMRD)
 
 
     def get_req(self):
@@ -5,6 +5,7 @@ in foodmate.
 
 """
 import os
+import functools
 import numpy as np
 import pandas as pd
 
@@ -18,7 +19,21 @@ from bokeh.palettes import Category10, Viridis256, Magma256
 from bokeh.io import export_png
 
 nut_dict_file = "{root}/ragdoll/NUTR_DEF_more.csv".format(root=os.getcwd())
-nut_dict_df = pd.read_csv(nut_dict_file, keep_default_na=False)
+
+@functools.lru_cache(maxsize=1)
+def foodmate_names():
+	"""dict of abbr and its Foodmate name.
+
+	nut_dict_file is read on the first call rather than when the package
+	is imported; the names are then looked up in a dict instead of masking
+	the dataframe per nutrient. Abbrs are unique in the dictionary.
+
+	"""
+
+	nut_dict_df = pd.read_csv(nut_dict_file, keep_default_na=False)
+
+	return dict(zip(nut_dict_df['abbr'].to_numpy(),
+					nut_dict_df['name_Foodmate'].to_numpy()))
 
 def donut_plot(meal, req_male, req_female):
 	"""A custom function for create donut plots
@@ -112,7 +127,8 @@ def plot_paracoor(meal, human):
 	nuts = ['VITA_IU', 'VITC', 'TOCPHA', 'CA', 'MG', 'FE', 'MN', 'ZN', 'CU', 
 			'K', 'P', 'NA', 'SE']
 
-	nut_names = [nut_dict_df[nut_dict_df['abbr'] == abbr]['name_Foodmate'].values[0] for abbr in nuts]
+	names = foodmate_names()
+	nut_names = [names[abbr] for abbr in nuts]
 
 	index = []
 	data = []
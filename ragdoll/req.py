@@ -3,16 +3,11 @@ This is a script to faciliate the construction of Requirement objects.
 """
 from bson import ObjectId
 import pandas as pd
-import os
 
 from .db import MongoDB
 from .composite import Nutrient, Nutrients
 
 
-nut_dict_file = "{root}/ragdoll/NUTR_DEF_more.csv".format(root=os.getcwd())
-nut_dict_df = pd.read_csv(nut_dict_file, keep_default_na=False)
-
-
 def Harris_Benedict_Revised(weight, height, age, gender, PAL):
     
     """
@@ -0,0 +1,107 @@
+"""
+A test for the inserts of MongoDB, on a mocked database.
+"""
+
+from unittest import mock
+
+import pymongo
+from bson import ObjectId
+
+from ragdoll.composite import Nutrient, Nutrients, IngredientComponent, MealComponent
+from ragdoll.db import MongoDB, _LRUCache, cache_size
+
+#------------------------------------------------#
+
+def mocked_mongo():
+
+    # No connection is made, only the database is set.
+    mongo = MongoDB.__new__(MongoDB)
+    mongo.database = mock.MagicMock()
+    mongo._doc_cache = _LRUCache(cache_size)
+    mongo._material_cache = _LRUCache(cache_size)
+
+    return mongo
+
+def ingredient(name, value, meta=None):
+
+    nutrients = Nutrients([Nutrient(name='protein', value=value, unit='g',
+                                    abbr='PROCNT', source='FM', name_source='FM')])
+
+    return IngredientComponent(name=name, value=value, nutrients=nutrients,
+                               meta=dict(meta or {}))
+
+def written_docs(mongo, col_name):
+
+    collection = mongo.database.__getitem__.return_value
+    mongo.database.__getitem__.assert_called_with(col_name)
+
+    (requests, ), kwargs = collection.bulk_write.call_args
+    assert kwargs == {'ordered' : False}
+    assert all(isinstance(request, pymongo.InsertOne) for request in requests)
+
+    return [request._doc for request in requests]
+
+#------------------------------------------------#
+
+def test_insert_items_foodmate():
+
+    mongo = mocked_mongo()
+    mongo.insert_items('Foodmate', [ingredient('egg', 1.0),
+                                    ingredient('rice', 2.0, {'type' : 'grain'})])
+
+    assert written_docs(mongo, 'Foodmate') == [
+        {'name' : 'egg', 'type' : 'DIY', 'source' : 'Analytical from ragdoll',
+         'nutrients' : [{'name' : 'protein', 'unit' : 'g', 'abbr' : 'PROCNT', 'value' : 1.0}]},
+        {'name' : 'rice', 'type' : 'grain', 'source' : 'Analytical from ragdoll',
+         'nutrients' : [{'name' : 'protein', 'unit' : 'g', 'abbr' : 'PROCNT', 'value' : 2.0}]}]
+
+def test_insert_items_diy():
+
+    meta = {'collection' : 'FM', 'item_id' : '0'}
+    meal = MealComponent(name='breakfast',
+                         children=[ingredient('egg', 1.0, meta), ingredient('rice', 2.0, meta)])
+
+    mongo = mocked_mongo()
+    mongo.insert_items('DIY', [meal])
+
+    assert written_docs(mongo, 'DIY') == [
+        {'name' : 'breakfast', 'value' : 3.0, 'unit' : 'g',
+         'materials' : [{'name' : 'egg', 'cook_amt' : 1.0, 'meta' : meta},
+                        {'name' : 'rice', 'cook_amt' : 2.0, 'meta' : meta}]}]
+
+def test_insert_items_not_serialized():
+
+    mongo = mocked_mongo()
+
+    try:
+        mongo.insert_items('USDA', [ingredient('egg', 1.0)])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("USDA items inserted")
+
+    mongo.database.__getitem__.return_value.bulk_write.assert_not_called()
+
+def test_writes_evict_cache():
+
+    mongo = mocked_mongo()
+    ids = [ObjectId(), ObjectId()]
+    for item_id in ids:
+        mongo._doc_cache[('Foodmate', str(item_id))] = {'_id' : item_id}
+        mongo._material_cache[('Foodmate', str(item_id))] = ingredient('old', 1.0)
+
+    # As the driver, give each document sent its _id.
+    def bulk_write(requests, ordered):
+        for request, item_id in zip(requests, ids):
+            request._doc['_id'] = item_id
+
+    mongo.database.__getitem__.return_value.bulk_write.side_effect = bulk_write
+    mongo.insert_items('Foodmate', [ingredient('egg', 1.0)])
+
+    assert ('Foodmate', str(ids[0])) not in mongo._doc_cache
+    assert ('Foodmate', str(ids[0])) not in mongo._material_cache
+    assert ('Foodmate', str(ids[1])) in mongo._doc_cache
+
+    mongo.update_item(ids[1], ingredient('egg', 1.0, {'collection' : 'Foodmate'}))
+
+    assert not mongo._doc_cache and not mongo._material_cache
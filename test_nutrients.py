@@ -0,0 +1,112 @@
+"""
+A test for the arithmetic of Nutrients.
+"""
+
+import numpy as np
+
+from ragdoll.composite import Nutrient, Nutrients
+
+#------------------------------------------------#
+
+def nutrient_list(values, unit='g'):
+
+    return [Nutrient(name=abbr, value=value, unit=unit, abbr=abbr,
+                     source='FM', name_source='FM')
+            for abbr, value in values.items()]
+
+def built(values, unit='g'):
+
+    return Nutrients(nutrient_list(values, unit))
+
+def lazy(values, unit='g'):
+
+    return Nutrients.from_values(nutrient_list(values, unit),
+                                np.array(list(values.values())))
+
+def scaled(values, unit='g'):
+
+    return built(values, unit) * 1.0
+
+def as_dict(nutrients):
+
+    return {abbr : nut.value for abbr, nut in nutrients.nutrients.items()}
+
+# self is a strict superset of other: few nutrients, and more than
+# vectorize_min_size of them.
+small_self = {'A' : 5.0, 'B' : 6.0}
+small_other = {'B' : 1.0}
+large_self = {'N{}'.format(i) : float(i + 1) for i in range(12)}
+large_other = {'N{}'.format(i) : 1.0 for i in range(11)}
+
+makers = (built, lazy, scaled)
+
+#------------------------------------------------#
+
+def test_add_superset():
+
+    for make_self in makers:
+        for make_other in makers:
+
+            assert as_dict(make_self(small_self) + make_other(small_other)) == {'B' : 7.0}
+
+            result = as_dict(make_self(large_self) + make_other(large_other))
+            assert result == {abbr : value + 1.0 for abbr, value in large_self.items()
+                              if abbr in large_other}
+
+def test_sub_superset():
+
+    for make_self in makers:
+        for make_other in makers:
+
+            assert as_dict(make_self(small_self) - make_other(small_other)) == {'B' : 5.0}
+
+            result = as_dict(make_self(large_self) - make_other(large_other))
+            assert result == {abbr : value - 1.0 for abbr, value in large_self.items()
+                              if abbr in large_other}
+
+def test_sum_superset():
+
+    for make in makers:
+
+        result = as_dict(sum([make(large_self), make(large_other), make(large_self)]))
+        assert result == {abbr : 2 * value + 1.0 for abbr, value in large_self.items()
+                          if abbr in large_other}
+
+def test_sub_errors():
+
+    # The same ValueError with and without arrays, for values and units.
+    for values in (small_self, large_self):
+        larger = {abbr : value + 1.0 for abbr, value in values.items()}
+        for make_self in makers:
+            for make_other in makers:
+
+                try:
+                    make_self(values) - make_other(larger)
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError("larger values subtracted")
+
+                try:
+                    make_self(larger) - make_other(values, unit='mg')
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError("units not tested")
+
+def test_sum_errors():
+
+    # Mismatched units raise ValueError, however many objects are summed.
+    for count in (2, 6):
+        for make in makers:
+
+            nutrients_list = [make(large_self) for i in range(count)]
+            nutrients_list.append(make(large_self, unit='mg'))
+
+            for summed in (sum, Nutrients.sum_many):
+                try:
+                    summed(nutrients_list)
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError("units not tested")